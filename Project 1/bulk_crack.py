@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Jan  4 14:18:21 2024
+
+@author: Aidan Alme
+@JHED: aalme2
+"""
+
+import argparse
+import collections
+import itertools
+import json
+import multiprocessing
+
+import caesar
+import frequency_model
+
+# The letter probabilities used by a worker process, set once when it starts
+_worker_probabilities = None
+
+def _init_worker (probabilities):
+    """
+    Function run once in every worker to keep the frequency model around
+
+    Parameters
+    ----------
+    probabilities : list
+        the expected probability of each letter.
+
+    Returns
+    -------
+    None.
+
+    """
+    global _worker_probabilities
+    _worker_probabilities = probabilities
+    return
+
+def _crack_lines (lines, jsonl, field, first_line):
+    """
+    Function to crack a chunk of input lines in a worker
+
+    Parameters
+    ----------
+    lines : list
+        the raw input lines.
+    jsonl : bool
+        whether each line is a JSON object rather than the message itself.
+    field : str
+        the key of the message in a JSON object.
+    first_line : int
+        the line number of the first line, for error records.
+
+    Returns
+    -------
+    output_lines : list
+        one JSON line per input line, in the same order, skipping blank
+        lines of JSON input.
+    num_cracked : int
+        the number of lines cracked, the rest being error records.
+
+    """
+    output_lines = []
+    num_cracked = 0
+    for line_number, line in enumerate(lines, first_line):
+        line = line.rstrip("\n")
+        if jsonl:
+            if not line.strip():
+                continue
+            #A malformed record gets an error record rather than stopping
+            #the whole run
+            try:
+                record = json.loads(line)
+                message = record[field]
+                if not isinstance(message, str):
+                    raise TypeError(f"{field!r} is not a string")
+            except (ValueError, KeyError, TypeError) as error:
+                output_lines.append(json.dumps(
+                    {"line": line_number,
+                     "error": f"{type(error).__name__}: {error}"}) + "\n")
+                continue
+        else:
+            record = {}
+            message = line
+        key, score, plaintext = caesar.crack_caesar(message,
+                                                    _worker_probabilities)
+        #Keep the fields of the input record so ids and the like survive
+        record["key"] = key
+        record["score"] = score
+        record["plaintext"] = plaintext
+        output_lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        num_cracked += 1
+    return output_lines, num_cracked
+
+def crack_file (input_file, output_file, corpus = "english", processes = None,
+                chunk_size = 1000, jsonl = None, field = "message"):
+    """
+    Function to crack every Caesar-shifted message of a file with a pool of
+    worker processes
+
+    Parameters
+    ----------
+    input_file : str
+        the name of the file with one message, or JSON record, per line.
+    output_file : str
+        the name of the JSON lines file to write, one record per input line
+        with the "key", "score" and "plaintext" added. Blank lines of JSON
+        input are skipped, and a malformed record is written as a record
+        with its "line" number and an "error".
+    corpus : str, optional
+        the name of the corpus of the frequency model. The default is
+        "english".
+    processes : int, optional
+        the number of worker processes. The default is the number of CPUs.
+    chunk_size : int, optional
+        the number of lines sent to a worker at a time. The default is 1000.
+    jsonl : bool, optional
+        whether the lines are JSON objects. The default is to decide from
+        the ".jsonl" or ".json" extension of the input file.
+    field : str, optional
+        the key of the message in a JSON object. The default is "message".
+
+    Returns
+    -------
+    num_messages : int
+        the number of messages cracked, not counting error records.
+
+    """
+    if jsonl is None:
+        jsonl = input_file.endswith((".jsonl", ".json"))
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    #Load the model once, the workers receive it when they start
+    probabilities = frequency_model.load_profile(corpus)
+    #Only a few chunks per worker are in flight at a time, which bounds the
+    #memory used whatever the size of the input
+    max_pending = 2 * processes
+    pending = collections.deque()
+    num_messages = 0
+    num_lines = 0
+    with open(input_file, 'r', encoding='utf-8-sig') as my_input_file, \
+         open(output_file, 'w', encoding='utf-8') as my_output_file, \
+         multiprocessing.Pool(processes, _init_worker,
+                              (probabilities,)) as pool:
+        while True:
+            lines = list(itertools.islice(my_input_file, chunk_size))
+            if lines:
+                pending.append(pool.apply_async(
+                    _crack_lines, (lines, jsonl, field, num_lines + 1)))
+                num_lines += len(lines)
+            #Write the oldest chunk first so the output keeps input order
+            while pending and (len(pending) >= max_pending or not lines):
+                output_lines, num_cracked = pending.popleft().get()
+                my_output_file.writelines(output_lines)
+                num_messages += num_cracked
+            if not lines:
+                break
+    return num_messages
+
+def main (argv = None):
+    """
+    Command line entry point for cracking a file of messages
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments. The default is sys.argv[1:].
+
+    Returns
+    -------
+    None.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Crack a file of Caesar-shifted messages")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("--corpus", default="english")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--field", default="message")
+    input_format = parser.add_mutually_exclusive_group()
+    input_format.add_argument("--jsonl", dest="jsonl", action="store_true",
+                              default=None)
+    input_format.add_argument("--lines", dest="jsonl", action="store_false")
+    args = parser.parse_args(argv)
+    num_messages = crack_file(args.input_file, args.output_file, args.corpus,
+                              args.processes, args.chunk_size, args.jsonl,
+                              args.field)
+    print("Cracked", num_messages, "messages")
+    return
+
+if __name__ == "__main__":
+    main()
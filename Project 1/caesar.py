@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Jan  4 14:18:21 2024
+
+@author: Aidan Alme
+@JHED: aalme2
+"""
+
+import numpy as np
+
+# The lowercase alphabet, only lowercase letters are ciphered
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+# Row k holds the cipher letter index of each plaintext letter under key k,
+# so indexing a histogram with it gives the plaintext histogram of every key
+ROTATIONS = (np.arange(26)[:, None] + np.arange(26)[None, :]) % 26
+
+# Translation tables which undo each key, built once
+_DECRYPTION_TABLES = [str.maketrans(ALPHABET[key:] + ALPHABET[:key], ALPHABET)
+                      for key in range(26)]
+
+def letter_histogram (message):
+    """
+    Function to count each lowercase letter in a message in a single pass
+
+    Parameters
+    ----------
+    message : string
+        the message.
+
+    Returns
+    -------
+    numpy.ndarray
+        the 26 letter counts in alphabetical order.
+
+    """
+    #Lowercase letters are single bytes in UTF-8 and no other character
+    #contains those bytes, so the bytes can be counted directly
+    data = np.frombuffer(message.encode("utf-8"), dtype=np.uint8)
+    return np.bincount(data, minlength=256)[97:123]
+
+def chi_square_scores (counts, probabilities):
+    """
+    Function to compute the chi score of every key at once by rotating the
+    histogram of the ciphertext
+
+    Parameters
+    ----------
+    counts : array_like
+        the letter counts of the ciphertext; extra leading dimensions score
+        several histograms, e.g. the columns of a polyalphabetic cipher.
+    probabilities : array_like
+        the expected probability of each letter.
+
+    Returns
+    -------
+    scores : numpy.ndarray
+        the chi score of each key, with the leading dimensions of counts.
+
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    #The plaintext histograms of all 26 keys, shape (..., 26, 26)
+    observed = counts[..., ROTATIONS]
+    expected = probabilities * counts.sum(axis=-1)[..., None, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = (observed - expected) ** 2 / expected
+    #A letter which is never expected nor observed adds nothing
+    terms[np.isnan(terms)] = 0.0
+    return terms.sum(axis=-1)
+
+def decrypt (message, key):
+    """
+    Function to undo a Caesar shift on the lowercase letters of a message
+
+    Parameters
+    ----------
+    message : string
+        the encrypted message.
+    key : int
+        the shift which was used to encrypt the message.
+
+    Returns
+    -------
+    string
+        the decrypted message.
+
+    """
+    return message.translate(_DECRYPTION_TABLES[key % 26])
+
+def crack_caesar (message, probabilities):
+    """
+    Function to find the most likely key of a Caesar-shifted message and
+    decrypt it
+
+    Parameters
+    ----------
+    message : string
+        the encrypted message.
+    probabilities : array_like
+        the expected probability of each letter.
+
+    Returns
+    -------
+    key : int
+        the most likely shift, from 0 to 25.
+    score : float
+        the chi score of that key.
+    plaintext : string
+        the message decrypted with that key.
+
+    """
+    counts = letter_histogram(message)
+    #A message without letters is its own plaintext
+    if not counts.any():
+        return 0, 0.0, message
+    scores = chi_square_scores(counts, probabilities)
+    key = int(np.argmin(scores))
+    return key, float(scores[key]), decrypt(message, key)
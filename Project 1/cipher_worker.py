@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Jan  4 14:18:21 2024
+
+@author: Aidan Alme
+@JHED: aalme2
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+
+import frequency_model
+import reverse
+import shifted
+
+def handle_request (request):
+    """
+    Function to answer a single request
+
+    Parameters
+    ----------
+    request : dict
+        the request; "op" is "atbash" or "caesar", "message" is the text to
+        decrypt, and a "caesar" request may name a "corpus". Any "id" is
+        echoed back.
+
+    Returns
+    -------
+    response : dict
+        the "plaintext", plus the "key" and "score" for "caesar", or an
+        "error" describing what went wrong.
+
+    """
+    response = {}
+    if not isinstance(request, dict):
+        response["error"] = "A request must be a JSON object"
+        return response
+    if "id" in request:
+        response["id"] = request["id"]
+    if "op" not in request or "message" not in request:
+        response["error"] = "A request needs an 'op' and a 'message'"
+        return response
+    operation = request["op"]
+    message = request["message"]
+    corpus = request.get("corpus", "english")
+    if not isinstance(message, str):
+        response["error"] = "The 'message' must be a string"
+    elif not isinstance(corpus, str):
+        response["error"] = "The 'corpus' must be a string"
+    elif operation == "atbash":
+        response["plaintext"] = reverse.decrypt(message)
+    elif operation == "caesar" and corpus not in frequency_model.CORPORA:
+        response["error"] = f"Unknown corpus {corpus!r}"
+    elif operation == "caesar":
+        key, score, plaintext = shifted.crack(message, corpus)
+        response["key"] = key
+        response["score"] = score
+        response["plaintext"] = plaintext
+    else:
+        response["error"] = f"Unknown op {operation!r}"
+    return response
+
+def handle_line (line):
+    """
+    Function to answer a request given as a line of JSON
+
+    Parameters
+    ----------
+    line : str
+        the JSON request.
+
+    Returns
+    -------
+    str
+        the JSON response, ending in a newline; an error response if the
+        request could not be answered.
+
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as error:
+        return json.dumps({"error": f"Invalid JSON: {error}"}) + "\n"
+    #No request, however malformed, may stop the worker answering the rest
+    try:
+        response = handle_request(request)
+    except Exception as error:
+        response = {"error": f"{type(error).__name__}: {error}"}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+    return json.dumps(response, ensure_ascii=False) + "\n"
+
+def serve_stream (source, destination):
+    """
+    Function to answer requests read from one stream on another, one JSON
+    object per line, until the source is closed
+
+    Parameters
+    ----------
+    source : text file
+        the stream of requests.
+    destination : text file
+        the stream for the responses.
+
+    Returns
+    -------
+    None.
+
+    """
+    for line in source:
+        if line.strip():
+            destination.write(handle_line(line))
+            #Answer each request now rather than when the buffer fills
+            destination.flush()
+    return
+
+class _LineHandler (socketserver.StreamRequestHandler):
+
+    """Answers the requests of one socket connection"""
+
+    def handle (self):
+        """
+        Method to answer JSON line requests until the client disconnects
+
+        Returns
+        -------
+        None.
+
+        """
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(handle_line(line.decode('utf-8')).encode(
+                    'utf-8'))
+        return
+
+def serve_socket (socket_file):
+    """
+    Function to answer requests on a local socket until interrupted
+
+    Parameters
+    ----------
+    socket_file : str
+        the path of the Unix socket to listen on.
+
+    Returns
+    -------
+    None.
+
+    """
+    if os.path.exists(socket_file):
+        os.remove(socket_file)
+    with socketserver.ThreadingUnixStreamServer(socket_file,
+                                                _LineHandler) as server:
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_file)
+    return
+
+def main (argv = None):
+    """
+    Command line entry point; loads the frequency model once and answers
+    requests on stdin, or on a socket with --socket
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments. The default is sys.argv[1:].
+
+    Returns
+    -------
+    None.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Answer cipher requests, one JSON object per line")
+    parser.add_argument("--socket", default=None,
+                        help="path of a Unix socket to listen on")
+    parser.add_argument("--corpus", action="append", default=None,
+                        help="a corpus to load before the first request")
+    args = parser.parse_args(argv)
+    #Warm the models up front so the first request is as fast as the rest
+    for corpus in args.corpus or ["english"]:
+        frequency_model.load_profile(corpus)
+    if args.socket:
+        try:
+            serve_socket(args.socket)
+        except KeyboardInterrupt:
+            pass
+    else:
+        serve_stream(sys.stdin, sys.stdout)
+    return
+
+if __name__ == "__main__":
+    main()
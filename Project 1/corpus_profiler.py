@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Jan  4 14:18:21 2024
+
+@author: Aidan Alme
+@JHED: aalme2
+"""
+
+import argparse
+import json
+import mmap
+import multiprocessing
+import os
+
+import numpy as np
+
+# The number of bytes counted at a time within a shard, 16 MiB
+BLOCK_SIZE = 1 << 24
+
+# The smallest shard worth sending to another process, 64 MiB
+MIN_SHARD_SIZE = 1 << 26
+
+# Maps every byte to the index of its letter from a to z ignoring case, or to
+# 26 for any byte which is not an ASCII letter
+LETTER_CODES = np.full(256, 26, dtype=np.uint8)
+LETTER_CODES[np.arange(65, 91)] = np.arange(26)
+LETTER_CODES[np.arange(97, 123)] = np.arange(26)
+
+def _count_shard (corpus_file, start, end):
+    """
+    Function to count the letters and letter pairs starting in a byte range
+    of a corpus
+
+    Parameters
+    ----------
+    corpus_file : str
+        the name of the corpus file.
+    start : int
+        the offset of the first byte of the shard.
+    end : int
+        the offset just past the last byte of the shard.
+
+    Returns
+    -------
+    unigrams : numpy.ndarray
+        the 26 letter counts.
+    bigrams : numpy.ndarray
+        the 26x26 counts of each letter followed directly by another.
+
+    """
+    pairs = np.zeros(27 * 27, dtype=np.int64)
+    #The code of the last byte of the file when it falls in this shard, as
+    #no pair starts there
+    last_code = None
+    with open(corpus_file, 'rb') as my_sample_file, \
+         mmap.mmap(my_sample_file.fileno(), 0,
+                   access=mmap.ACCESS_READ) as corpus:
+        for block_start in range(start, end, BLOCK_SIZE):
+            block_end = min(block_start + BLOCK_SIZE, end)
+            #Read one byte past the block so pairs across its end are counted
+            codes = LETTER_CODES[np.frombuffer(
+                corpus[block_start : block_end + 1], dtype=np.uint8)]
+            #Count every byte pair starting in the block, letters or not
+            pairs += np.bincount(codes[:-1] * np.uint16(27) + codes[1:],
+                                 minlength=27 * 27)
+            if block_end == len(corpus):
+                last_code = codes[-1]
+    pairs = pairs.reshape(27, 27)
+    #Every byte but the last of the file starts exactly one pair, so the
+    #letter counts come from the same table
+    unigrams = pairs.sum(axis=1)
+    if last_code is not None:
+        unigrams[last_code] += 1
+    return unigrams[:26], pairs[:26, :26]
+
+def profile_corpus (corpus_file, processes = None):
+    """
+    Function to count the letters and letter pairs of a corpus, splitting
+    large files into shards counted in parallel
+
+    Parameters
+    ----------
+    corpus_file : str
+        the name of the corpus file.
+    processes : int, optional
+        the number of worker processes. The default is the number of CPUs.
+
+    Returns
+    -------
+    unigrams : numpy.ndarray
+        the 26 letter counts, ignoring case.
+    bigrams : numpy.ndarray
+        the 26x26 counts where [i, j] is letter i directly followed by
+        letter j.
+
+    """
+    size = os.path.getsize(corpus_file)
+    if size == 0:
+        return np.zeros(26, dtype=np.int64), np.zeros((26, 26), dtype=np.int64)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    #Split the file into equal byte ranges, no smaller than MIN_SHARD_SIZE
+    num_shards = max(1, min(processes, size // MIN_SHARD_SIZE))
+    bounds = np.linspace(0, size, num_shards + 1).astype(np.int64)
+    shards = [(corpus_file, int(bounds[index]), int(bounds[index + 1]))
+              for index in range(num_shards)]
+    if num_shards == 1:
+        results = [_count_shard(*shards[0])]
+    else:
+        with multiprocessing.Pool(min(processes, num_shards)) as pool:
+            results = pool.starmap(_count_shard, shards)
+    #Merge the partial counts of the shards
+    unigrams = sum(result[0] for result in results)
+    bigrams = sum(result[1] for result in results)
+    return unigrams, bigrams
+
+def main (argv = None):
+    """
+    Command line entry point which writes the unigram and bigram tables of a
+    corpus as JSON
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments. The default is sys.argv[1:].
+
+    Returns
+    -------
+    None.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Count the letters and letter pairs of a corpus")
+    parser.add_argument("corpus_file")
+    parser.add_argument("output_file")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+    unigrams, bigrams = profile_corpus(args.corpus_file, args.processes)
+    with open(args.output_file, 'w', encoding='utf-8') as my_output_file:
+        json.dump({"unigrams": unigrams.tolist(),
+                   "bigrams": bigrams.tolist()}, my_output_file)
+    return
+
+if __name__ == "__main__":
+    main()
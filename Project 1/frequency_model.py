@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Jan  4 14:18:21 2024
+
+@author: Aidan Alme
+@JHED: aalme2
+"""
+
+import hashlib
+import json
+import os
+
+import corpus_profiler
+
+# The size of the blocks read from a corpus at a time, 1 MiB
+CHUNK_SIZE = 1 << 20
+
+# The directory of compiled profiles and tables, in the user's cache
+# directory
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or
+                         os.path.join(os.path.expanduser("~"), ".cache"),
+                         "cipher_profiles")
+
+# The file name ending of a compiled profile
+PROFILE_SUFFIX = ".profile.json"
+
+# The named corpora which can be used, new ones are added with register_corpus
+CORPORA = {"english": "pride_prejudice.txt"}
+
+# The profiles already loaded in this process, keyed by corpus name
+_loaded_profiles = {}
+
+def register_corpus (name, corpus_file):
+    """
+    Function to add or replace a named corpus, such as another language
+
+    Parameters
+    ----------
+    name : str
+        the name used to refer to the corpus.
+    corpus_file : str
+        the name of the text file containing the corpus.
+
+    Returns
+    -------
+    None.
+
+    """
+    CORPORA[name] = corpus_file
+    #Forget a profile loaded from a previous file under the same name
+    _loaded_profiles.pop(name, None)
+    return
+
+def cache_file (corpus_file, suffix):
+    """
+    Function to name the file in CACHE_DIR compiled from a corpus; the name
+    comes from the corpus's absolute path, so corpora with the same file
+    name in different directories do not share it
+
+    Parameters
+    ----------
+    corpus_file : str
+        the name of the corpus file.
+    suffix : str
+        the file name ending of the kind of compiled file.
+
+    Returns
+    -------
+    str
+        the name of the compiled file.
+
+    """
+    path = os.path.abspath(corpus_file)
+    digest = hashlib.sha256(path.encode("utf-8", "surrogateescape"))
+    return os.path.join(CACHE_DIR, digest.hexdigest()[:16] + "-" +
+                        os.path.basename(path) + suffix)
+
+def corpus_hash (corpus_file):
+    """
+    Function to compute the SHA-256 hash of a corpus
+
+    Parameters
+    ----------
+    corpus_file : str
+        the name of the corpus file.
+
+    Returns
+    -------
+    str
+        the hexadecimal digest of the file.
+
+    """
+    digest = hashlib.sha256()
+    with open(corpus_file, 'rb') as my_sample_file:
+        for chunk in iter(lambda: my_sample_file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_profile (corpus_file):
+    """
+    Function to compile the letter frequency profile of a corpus
+
+    Parameters
+    ----------
+    corpus_file : str
+        the name of the corpus file.
+
+    Returns
+    -------
+    profile : dict
+        the profile, with the hash and stats of the corpus it was built from,
+        the letter "counts", the 26x26 "bigram_counts" and the letter
+        "probabilities".
+
+    """
+    stats = os.stat(corpus_file)
+    unigrams, bigrams = corpus_profiler.profile_corpus(corpus_file)
+    counts = unigrams.tolist()
+    num_chars = sum(counts)
+    if num_chars == 0:
+        raise ValueError(f"Corpus {corpus_file} contains no letters")
+    profile = {"sha256": corpus_hash(corpus_file),
+               "size": stats.st_size,
+               "mtime_ns": stats.st_mtime_ns,
+               "counts": counts,
+               "bigram_counts": bigrams.tolist(),
+               "probabilities": [num / num_chars for num in counts]}
+    return profile
+
+def _save_profile (profile, profile_file):
+    """
+    Function to write a profile atomically so a reader never sees half of
+    it; if it cannot be written, it is only kept in memory
+
+    Parameters
+    ----------
+    profile : dict
+        the profile to save.
+    profile_file : str
+        the name of the file to write.
+
+    Returns
+    -------
+    None.
+
+    """
+    temporary_file = profile_file + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(profile_file), exist_ok=True)
+        with open(temporary_file, 'w', encoding='utf-8') as my_profile_file:
+            json.dump(profile, my_profile_file)
+        os.replace(temporary_file, profile_file)
+    except OSError:
+        #A read-only cache only costs compiling the profile again next time
+        pass
+    return
+
+def load_profile (name = "english", rebuild = False):
+    """
+    Function to get the letter probabilities of a named corpus; the compiled
+    profile is read from CACHE_DIR if it matches the corpus, and rebuilt
+    otherwise
+
+    Parameters
+    ----------
+    name : str, optional
+        the name of the corpus. The default is "english".
+    rebuild : bool, optional
+        whether to ignore any existing profile. The default is False.
+
+    Returns
+    -------
+    list
+        the probability of each letter from a to z.
+
+    """
+    if name in _loaded_profiles and not rebuild:
+        return _loaded_profiles[name]["probabilities"]
+    corpus_file = CORPORA[name]
+    profile_file = cache_file(corpus_file, PROFILE_SUFFIX)
+    profile = None
+    if not rebuild and os.path.exists(profile_file):
+        with open(profile_file, 'r', encoding='utf-8') as my_profile_file:
+            profile = json.load(my_profile_file)
+        stats = os.stat(corpus_file)
+        #An unchanged size and modification time means the corpus is the
+        #same; otherwise the hash decides, so touching the file is cheap
+        if (profile.get("size") != stats.st_size or
+            profile.get("mtime_ns") != stats.st_mtime_ns):
+            if profile.get("sha256") == corpus_hash(corpus_file):
+                profile["size"] = stats.st_size
+                profile["mtime_ns"] = stats.st_mtime_ns
+                _save_profile(profile, profile_file)
+            else:
+                profile = None
+    #Compile and save the profile if there is no valid one
+    if profile is None:
+        profile = build_profile(corpus_file)
+        _save_profile(profile, profile_file)
+    _loaded_profiles[name] = profile
+    return profile["probabilities"]
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Jan  4 14:18:21 2024
+
+@author: Aidan Alme
+@JHED: aalme2
+"""
+
+import json
+import mmap
+import os
+
+import numpy as np
+
+import caesar
+import corpus_profiler
+import frequency_model
+
+# The number of distinct quadgrams, the length of the table
+NUM_QUADGRAMS = 26 ** 4
+
+# The file name ending of a compiled table and of its description
+TABLE_SUFFIX = ".quadgrams.npy"
+INFO_SUFFIX = ".quadgrams.json"
+
+# The number of quadgrams scored between checks of the early exit bound
+BLOCK_SIZE = 32
+
+# The tables already loaded in this process, keyed by corpus name
+_loaded_tables = {}
+
+# The smallest and largest entries of each table, keyed by its id
+_table_bounds = {}
+
+def count_quadgrams (corpus_file):
+    """
+    Function to count every run of four letters in a corpus, ignoring case
+    and anything between the letters
+
+    Parameters
+    ----------
+    corpus_file : str
+        the name of the corpus file.
+
+    Returns
+    -------
+    counts : numpy.ndarray
+        the count of each quadgram, indexed by quadgram_indices.
+
+    """
+    counts = np.zeros(NUM_QUADGRAMS, dtype=np.int64)
+    #The last three letters of the previous block, to join up with the next
+    carry = np.zeros(0, dtype=np.int64)
+    with open(corpus_file, 'rb') as my_sample_file:
+        if os.fstat(my_sample_file.fileno()).st_size == 0:
+            return counts
+        with mmap.mmap(my_sample_file.fileno(), 0,
+                       access=mmap.ACCESS_READ) as corpus:
+            for start in range(0, len(corpus), corpus_profiler.BLOCK_SIZE):
+                codes = corpus_profiler.LETTER_CODES[np.frombuffer(
+                    corpus[start : start + corpus_profiler.BLOCK_SIZE],
+                    dtype=np.uint8)]
+                codes = np.concatenate((carry, codes[codes < 26]))
+                if codes.size >= 4:
+                    counts += np.bincount(quadgram_indices(codes),
+                                          minlength=NUM_QUADGRAMS)
+                carry = codes[-3:]
+    return counts
+
+def quadgram_indices (codes):
+    """
+    Function to find the table index of every quadgram of a run of letters
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        the letter indices, from 0 to 25; each row of a 2D array is a
+        separate run.
+
+    Returns
+    -------
+    numpy.ndarray
+        the index of each of the quadgrams along the last axis.
+
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    return (((codes[..., :-3] * 26 + codes[..., 1:-2]) * 26
+             + codes[..., 2:-1]) * 26 + codes[..., 3:])
+
+def build_table (corpus_file):
+    """
+    Function to compute the log probability of every quadgram of a corpus;
+    quadgrams which never occur get the log probability of a hundredth of
+    a single occurrence
+
+    Parameters
+    ----------
+    corpus_file : str
+        the name of the corpus file.
+
+    Returns
+    -------
+    numpy.ndarray
+        the float32 log10 probability of each quadgram.
+
+    """
+    counts = count_quadgrams(corpus_file).astype(np.float64)
+    total = counts.sum()
+    if total == 0:
+        raise ValueError(f"Corpus {corpus_file} contains no quadgrams")
+    counts[counts == 0] = 0.01
+    return np.log10(counts / total).astype(np.float32)
+
+def _save_info (info, info_file):
+    """
+    Function to write the description of a table atomically
+
+    Parameters
+    ----------
+    info : dict
+        the hash and stats of the corpus the table was built from.
+    info_file : str
+        the name of the file to write.
+
+    Returns
+    -------
+    None.
+
+    """
+    temporary_file = info_file + ".tmp"
+    with open(temporary_file, 'w', encoding='utf-8') as my_info_file:
+        json.dump(info, my_info_file)
+    os.replace(temporary_file, info_file)
+    return
+
+def load_table (name = "english", rebuild = False):
+    """
+    Function to get the quadgram table of a named corpus, memory-mapped from
+    its compiled file in frequency_model.CACHE_DIR, which is rebuilt when
+    the corpus changes; a table which cannot be saved is kept in memory
+
+    Parameters
+    ----------
+    name : str, optional
+        the name of the corpus in frequency_model.CORPORA. The default is
+        "english".
+    rebuild : bool, optional
+        whether to ignore any existing table. The default is False.
+
+    Returns
+    -------
+    numpy.ndarray
+        the read-only log10 probability of each quadgram.
+
+    """
+    if name in _loaded_tables and not rebuild:
+        return _loaded_tables[name]
+    corpus_file = frequency_model.CORPORA[name]
+    table_file = frequency_model.cache_file(corpus_file, TABLE_SUFFIX)
+    info_file = frequency_model.cache_file(corpus_file, INFO_SUFFIX)
+    stats = os.stat(corpus_file)
+    valid = False
+    if not rebuild and os.path.exists(table_file) and os.path.exists(
+            info_file):
+        with open(info_file, 'r', encoding='utf-8') as my_info_file:
+            info = json.load(my_info_file)
+        #An unchanged size and modification time means the corpus is the
+        #same; otherwise the hash decides, so touching the file is cheap
+        valid = (info.get("size") == stats.st_size and
+                 info.get("mtime_ns") == stats.st_mtime_ns)
+        if not valid and info.get("sha256") == frequency_model.corpus_hash(
+                corpus_file):
+            valid = True
+            info["size"] = stats.st_size
+            info["mtime_ns"] = stats.st_mtime_ns
+            try:
+                _save_info(info, info_file)
+            except OSError:
+                pass
+    if valid:
+        #A plain array view of the mapping indexes faster than the memmap
+        table = np.load(table_file, mmap_mode='r').view(np.ndarray)
+    else:
+        table = build_table(corpus_file)
+        info = {"sha256": frequency_model.corpus_hash(corpus_file),
+                "size": stats.st_size, "mtime_ns": stats.st_mtime_ns}
+        #Write the table before its description so a reader never pairs a
+        #new description with an old table
+        try:
+            os.makedirs(os.path.dirname(table_file), exist_ok=True)
+            temporary_file = table_file + ".tmp.npy"
+            np.save(temporary_file, table)
+            os.replace(temporary_file, table_file)
+            _save_info(info, info_file)
+        except OSError:
+            #A read-only cache only costs building the table again next time
+            pass
+        table.flags.writeable = False
+    _loaded_tables[name] = table
+    return table
+
+def table_bounds (table):
+    """
+    Function to find the smallest and largest log probability of a table,
+    remembered so that each table is only scanned once
+
+    Parameters
+    ----------
+    table : numpy.ndarray
+        the quadgram log probabilities.
+
+    Returns
+    -------
+    min_log : float
+        the smallest log probability.
+    max_log : float
+        the largest log probability.
+
+    """
+    entry = _table_bounds.get(id(table))
+    #The table is kept in the entry so its id cannot be reused
+    if entry is None or entry[0] is not table:
+        entry = (table, float(table.min()), float(table.max()))
+        _table_bounds[id(table)] = entry
+    return entry[1], entry[2]
+
+def score (codes, table, best = -np.inf):
+    """
+    Function to compute the quadgram log probability of a run of letters,
+    giving up once it can no longer beat the best score so far
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        the letter indices, from 0 to 25.
+    table : numpy.ndarray
+        the quadgram log probabilities.
+    best : float, optional
+        the score to beat. The default is -inf.
+
+    Returns
+    -------
+    float
+        the score, or -inf if it was abandoned.
+
+    """
+    max_log = table_bounds(table)[1]
+    logs = table[quadgram_indices(codes)]
+    total = 0.0
+    for start in range(0, logs.size, BLOCK_SIZE):
+        total += float(logs[start : start + BLOCK_SIZE].sum(dtype=np.float64))
+        #Every quadgram still to come adds at most max_log
+        remaining = logs.size - start - BLOCK_SIZE
+        if remaining > 0 and total + remaining * max_log < best:
+            return -np.inf
+    return total if total >= best else -np.inf
+
+def crack_caesar (message, table, probabilities = None):
+    """
+    Function to find the most likely key of a Caesar-shifted message by its
+    quadgram score, which is reliable for short messages; all keys are
+    scored together a block at a time and a key is dropped as soon as it
+    can no longer catch up with the leader
+
+    Parameters
+    ----------
+    message : string
+        the encrypted message.
+    table : numpy.ndarray
+        the quadgram log probabilities.
+    probabilities : array_like, optional
+        the expected probability of each letter, used to fall back on the
+        chi score when the message has fewer than four letters.
+
+    Returns
+    -------
+    key : int
+        the most likely shift, from 0 to 25.
+    score : float
+        the quadgram score of that key.
+    plaintext : string
+        the message decrypted with that key.
+
+    """
+    data = np.frombuffer(message.encode("utf-8"), dtype=np.uint8)
+    codes = data[(data >= 97) & (data <= 122)].astype(np.int64) - 97
+    #Too few letters for a quadgram, so fall back on the chi score
+    if codes.size < 4:
+        if probabilities is None:
+            return 0, 0.0, message
+        return caesar.crack_caesar(message, probabilities)
+    min_log, max_log = table_bounds(table)
+    keys = np.arange(26)
+    #The quadgram indices of the decryption under every key, one row each
+    indices = quadgram_indices((codes - keys[:, None]) % 26)
+    totals = np.zeros(26)
+    num_quadgrams = indices.shape[1]
+    for start in range(0, num_quadgrams, BLOCK_SIZE):
+        totals += table[indices[:, start : start + BLOCK_SIZE]].sum(
+            axis=1, dtype=np.float64)
+        remaining = num_quadgrams - start - BLOCK_SIZE
+        if remaining > 0 and keys.size > 1:
+            #The leader ends up no lower than this, so any key which cannot
+            #reach it even with the best possible quadgrams is abandoned
+            floor = totals.max() + remaining * min_log
+            alive = totals + remaining * max_log >= floor
+            keys = keys[alive]
+            totals = totals[alive]
+            indices = indices[alive]
+    best = int(np.argmax(totals))
+    return (int(keys[best]), float(totals[best]),
+            caesar.decrypt(message, int(keys[best])))
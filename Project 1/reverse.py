@@ -7,21 +7,42 @@ Created on Thu Jan  4 13:47:10 2024
 @JHED: aalme2
 """
 
-# Prompt for user input
-encrypted_message = input("Enter the encrypted message: ")
-
-# Create an empy string for the plaintext message
-decrypted_message = ""
-
-# Iterate throught the characters in the message to decrypt them
-for char in encrypted_message:
-    # Decode the standard lowercase alphabetic characters
-    if ord(char) >= 97 and ord(char) <= 122:
-        # Uses ASCII values in a decryption algorithm
-        decrypted_message += (chr(-1 * ord(char) + 219))
-    # Leave all other characters as is    
-    else:
-        decrypted_message += char    
-
-# Print the decrypted message    
-print("The plaintext message is:", decrypted_message)
\ No newline at end of file
+import atbash
+
+def decrypt (encrypted_message):
+    """
+    Function to decrypt a message encrypted with the Atbash cipher
+
+    Parameters
+    ----------
+    encrypted_message : string
+        the encrypted message.
+
+    Returns
+    -------
+    string
+        the plaintext message.
+
+    """
+    # Decrypt the standard lowercase alphabetic characters with a translation
+    # table, all other characters are left as is
+    return atbash.atbash(encrypted_message)
+
+def main ():
+    """
+    Prompts for an encrypted message and prints its decryption
+
+    Returns
+    -------
+    None.
+
+    """
+    # Prompt for user input
+    encrypted_message = input("Enter the encrypted message: ")
+
+    # Print the decrypted message
+    print("The plaintext message is:", decrypt(encrypted_message))
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Jan  4 14:18:21 2024
+
+@author: Aidan Alme
+@JHED: aalme2
+"""
+
+import numpy as np
+
+import caesar
+
+# The longest key tried by default
+MAX_PERIOD = 64
+
+def _shift_letters (message, key, direction):
+    """
+    Function to shift the lowercase letters of a message by a repeating key;
+    the key only advances on lowercase letters
+
+    Parameters
+    ----------
+    message : string
+        the message.
+    key : string
+        the key, lowercase letters where a is a shift of 0.
+    direction : int
+        1 to encrypt and -1 to decrypt.
+
+    Returns
+    -------
+    string
+        the shifted message.
+
+    """
+    data = np.frombuffer(message.encode("utf-8"), dtype=np.uint8).copy()
+    mask = (data >= 97) & (data <= 122)
+    shifts = np.frombuffer(key.encode("ascii"),
+                           dtype=np.uint8).astype(np.int64) - 97
+    letters = data[mask].astype(np.int64) - 97
+    #Line the key up with the letters, leaving everything else untouched
+    letters += direction * np.tile(shifts, -(-letters.size // shifts.size))[
+        :letters.size]
+    data[mask] = letters % 26 + 97
+    return data.tobytes().decode("utf-8")
+
+def encrypt (message, key):
+    """
+    Function to encrypt a message with a repeating-key (Vigenère) cipher
+
+    Parameters
+    ----------
+    message : string
+        the message.
+    key : string
+        the key, lowercase letters where a is a shift of 0.
+
+    Returns
+    -------
+    string
+        the encrypted message.
+
+    """
+    return _shift_letters(message, key, 1)
+
+def decrypt (message, key):
+    """
+    Function to decrypt a message encrypted with a repeating-key cipher
+
+    Parameters
+    ----------
+    message : string
+        the encrypted message.
+    key : string
+        the key, lowercase letters where a is a shift of 0.
+
+    Returns
+    -------
+    string
+        the decrypted message.
+
+    """
+    return _shift_letters(message, key, -1)
+
+def letter_codes (message):
+    """
+    Function to find the lowercase letters of a message as numbers
+
+    Parameters
+    ----------
+    message : string
+        the message.
+
+    Returns
+    -------
+    numpy.ndarray
+        the index from 0 to 25 of each lowercase letter, in order.
+
+    """
+    data = np.frombuffer(message.encode("utf-8"), dtype=np.uint8)
+    return data[(data >= 97) & (data <= 122)].astype(np.int64) - 97
+
+def column_counts (codes, period):
+    """
+    Function to count the letters of each column when the letters are
+    written in rows of a given length
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        the letter indices.
+    period : int
+        the number of columns, the candidate key length.
+
+    Returns
+    -------
+    numpy.ndarray
+        the (period, 26) letter counts of the columns.
+
+    """
+    columns = np.arange(codes.size) % period
+    return np.bincount(columns * 26 + codes,
+                       minlength=period * 26).reshape(period, 26)
+
+def index_of_coincidence (codes, max_period = MAX_PERIOD):
+    """
+    Function to compute the average index of coincidence of the columns for
+    every candidate key length
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        the letter indices.
+    max_period : int, optional
+        the longest key length tried. The default is MAX_PERIOD.
+
+    Returns
+    -------
+    iocs : numpy.ndarray
+        the index of coincidence of key lengths 1 to max_period.
+
+    """
+    iocs = np.zeros(max_period)
+    for period in range(1, max_period + 1):
+        counts = column_counts(codes, period)
+        totals = counts.sum(axis=1)
+        pairs = totals * (totals - 1)
+        #Columns with fewer than two letters say nothing
+        valid = pairs > 0
+        if valid.any():
+            iocs[period - 1] = np.mean(
+                (counts * (counts - 1)).sum(axis=1)[valid] / pairs[valid])
+    return iocs
+
+def find_key_length (codes, max_period = MAX_PERIOD, tolerance = 0.1):
+    """
+    Function to choose the most likely key length; multiples of the key
+    length score as well as the key length itself, so the shortest length
+    close to the best score is taken
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        the letter indices.
+    max_period : int, optional
+        the longest key length tried. The default is MAX_PERIOD.
+    tolerance : float, optional
+        how far below the best index of coincidence, as a fraction, a
+        shorter length may be. The default is 0.1.
+
+    Returns
+    -------
+    int
+        the key length.
+
+    """
+    #A key cannot be longer than half the letters and still be found
+    max_period = max(1, min(max_period, codes.size // 2))
+    iocs = index_of_coincidence(codes, max_period)
+    return int(np.argmax(iocs >= (1 - tolerance) * iocs.max())) + 1
+
+def crack_vigenere (message, probabilities, max_period = MAX_PERIOD):
+    """
+    Function to find the most likely key of a repeating-key cipher and
+    decrypt the message
+
+    Parameters
+    ----------
+    message : string
+        the encrypted message.
+    probabilities : array_like
+        the expected probability of each letter.
+    max_period : int, optional
+        the longest key length tried. The default is MAX_PERIOD.
+
+    Returns
+    -------
+    key : string
+        the most likely key.
+    score : float
+        the sum of the chi scores of the columns under that key.
+    plaintext : string
+        the message decrypted with that key.
+
+    """
+    codes = letter_codes(message)
+    if codes.size == 0:
+        return "a", 0.0, message
+    period = find_key_length(codes, max_period)
+    #Each column is a Caesar cipher, scored for all keys at once
+    scores = caesar.chi_square_scores(column_counts(codes, period),
+                                      probabilities)
+    shifts = np.argmin(scores, axis=1)
+    key = (shifts + 97).astype(np.uint8).tobytes().decode("ascii")
+    score = float(scores[np.arange(period), shifts].sum())
+    return key, score, decrypt(message, key)
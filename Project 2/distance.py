@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Jan  5 11:03:24 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import numpy as np
+
+import packed_dna
+
+# The number of characters compared at once by the batch functions
+BLOCK_SIZE = 1 << 22
+
+def _characters (sequence):
+    """
+    Function to view a sequence as an array with one element per character
+
+    Parameters
+    ----------
+    sequence : string, bytes or numpy.ndarray
+        the sequence.
+
+    Returns
+    -------
+    numpy.ndarray
+        the characters, as bytes where possible.
+
+    """
+    if isinstance(sequence, np.ndarray):
+        return sequence
+    if isinstance(sequence, str):
+        try:
+            sequence = sequence.encode("latin-1")
+        except UnicodeEncodeError:
+            return np.frombuffer(sequence.encode("utf-32-le"),
+                                 dtype=np.uint32)
+    return np.frombuffer(sequence, dtype=np.uint8)
+
+def _packed_mismatches (reference, reads):
+    """
+    Function to count the differing bases between a packed sequence and rows
+    of packed reads, XOR and a popcount per byte
+
+    Parameters
+    ----------
+    reference : numpy.ndarray
+        the packed bytes of the reference.
+    reads : numpy.ndarray
+        the packed bytes of each read, one row each.
+
+    Returns
+    -------
+    numpy.ndarray
+        the number of differing bases of each read.
+
+    """
+    difference = reads ^ reference
+    #One bit per base which is set when either of its bits differ
+    differing = (difference | (difference >> 1)) & 0x55
+    return packed_dna.POPCOUNT[differing].sum(axis=-1, dtype=np.int64)
+
+def hamming (reference, read):
+    """
+    Function to count the positions where two sequences of the same length
+    differ
+
+    Parameters
+    ----------
+    reference : string, bytes, numpy.ndarray or PackedDNA
+        the correct sequence.
+    read : string, bytes, numpy.ndarray or PackedDNA
+        the sequence with errors, of the same type.
+
+    Returns
+    -------
+    int
+        the number of differing positions.
+
+    """
+    if len(reference) != len(read):
+        raise ValueError("Sequences must be the same length")
+    if isinstance(reference, packed_dna.PackedDNA):
+        return reference.mismatches(read)
+    return int(np.count_nonzero(_characters(reference) != _characters(read)))
+
+def hamming_batch (reference, reads):
+    """
+    Function to count the positions where each of many reads differs from
+    one reference of the same length
+
+    Parameters
+    ----------
+    reference : string, bytes, numpy.ndarray or PackedDNA
+        the correct sequence.
+    reads : list or numpy.ndarray
+        the reads, of the same type as the reference, or a 2D array of
+        characters with one read per row.
+
+    Returns
+    -------
+    numpy.ndarray
+        the number of differing positions of each read.
+
+    """
+    length = len(reference)
+    if isinstance(reads, np.ndarray) and reads.ndim == 2:
+        if reads.shape[1] != length:
+            raise ValueError("Sequences must be the same length")
+        reference = _characters(reference)
+        counts = np.empty(reads.shape[0], dtype=np.int64)
+        step = max(1, BLOCK_SIZE // max(length, 1))
+        for start in range(0, reads.shape[0], step):
+            counts[start : start + step] = np.count_nonzero(
+                reads[start : start + step] != reference, axis=1)
+        return counts
+    if any(len(read) != length for read in reads):
+        raise ValueError("Sequences must be the same length")
+    packed = isinstance(reference, packed_dna.PackedDNA)
+    reference_bytes = (np.frombuffer(reference.to_bytes(), dtype=np.uint8)
+                       if packed else _characters(reference))
+    counts = np.empty(len(reads), dtype=np.int64)
+    step = max(1, BLOCK_SIZE // max(reference_bytes.size, 1))
+    for start in range(0, len(reads), step):
+        block = reads[start : start + step]
+        #Join each block of reads into one buffer, a row per read
+        if packed:
+            rows = np.frombuffer(b"".join(read.to_bytes() for read in block),
+                                 dtype=np.uint8).reshape(len(block), -1)
+            counts[start : start + step] = _packed_mismatches(
+                reference_bytes, rows)
+        else:
+            rows = np.array([_characters(read) for read in block],
+                            dtype=reference_bytes.dtype).reshape(
+                                len(block), length)
+            counts[start : start + step] = np.count_nonzero(
+                rows != reference_bytes, axis=1)
+    return counts
+
+def _banded_levenshtein (reference, reads, lengths, band):
+    """
+    Function to compute the banded edit distances of a block of reads,
+    working through the reference a row at a time with every read at once;
+    each row only holds the 2 * band + 1 cells around its diagonal, and a
+    running minimum settles the insertions along a row in one step
+
+    Parameters
+    ----------
+    reference : numpy.ndarray
+        the characters of the reference.
+    reads : numpy.ndarray
+        the characters of the reads, one column each, starting band + 1
+        rows down and padded at the end.
+    lengths : numpy.ndarray
+        the number of characters of each read.
+    band : int
+        the largest difference between positions in the two sequences.
+
+    Returns
+    -------
+    numpy.ndarray
+        the edit distance of each read, band + 1 for any further.
+
+    """
+    width = 2 * band + 1
+    cap = band + 1
+    dtype = np.int16 if 3 * width < np.iinfo(np.int16).max else np.int32
+    #Cell t of a row is at read position j = i + t - band; the reads run
+    #along the second axis so every step works on whole contiguous rows
+    offsets = np.arange(width, dtype=dtype)[:, None]
+    diagonals = np.arange(-band, band + 1)
+    row = np.where(diagonals >= 0, np.minimum(diagonals, cap), cap)
+    row = np.repeat(row.astype(dtype)[:, None], reads.shape[1], axis=1)
+    step = np.empty_like(row)
+    for i in range(1, reference.size + 1):
+        #Substitution or match from the diagonal, deletion from above
+        np.not_equal(reads[i : i + width], reference[i - 1], out=step)
+        step += row
+        np.minimum(step[:-1], row[1:] + 1, out=step[:-1])
+        np.minimum(step[-1], cap, out=step[-1])
+        columns = i + diagonals
+        if columns[0] <= 0:
+            step[columns < 0] = cap
+            step[columns == 0] = min(i, cap)
+        #Insertions along the row: cell t is min over s <= t of cell s plus
+        #t - s
+        step -= offsets
+        np.minimum.accumulate(step, axis=0, out=row)
+        row += offsets
+        np.minimum(row, cap, out=row)
+    #The distance of each read is the cell at its own length
+    diagonal = lengths - reference.size
+    inside = np.flatnonzero(np.abs(diagonal) <= band)
+    distances = np.full(reads.shape[1], cap, dtype=np.int64)
+    distances[inside] = row[diagonal[inside] + band, inside]
+    return distances
+
+def levenshtein_batch (reference, reads, band = None):
+    """
+    Function to compute the edit distance, counting substitutions,
+    insertions and deletions, between one reference and each of many reads;
+    only alignments which stray at most band positions from the diagonal
+    are considered, so any distance above band is reported as band + 1
+
+    Parameters
+    ----------
+    reference : string, bytes or numpy.ndarray
+        the correct sequence.
+    reads : list
+        the reads, of the same type as the reference.
+    band : int, optional
+        the largest distance to measure exactly. The default is the length
+        of the longest sequence, which measures every distance exactly.
+
+    Returns
+    -------
+    numpy.ndarray
+        the edit distance of each read.
+
+    """
+    reference = _characters(reference)
+    reads = [_characters(read) for read in reads]
+    lengths = np.array([read.size for read in reads], dtype=np.int64)
+    if band is None:
+        band = int(max(reference.size, lengths.max(initial=0)))
+    if band < 0:
+        raise ValueError("The band cannot be negative")
+    dtype = np.result_type(reference, *reads[:1])
+    distances = np.empty(len(reads), dtype=np.int64)
+    columns = max(reference.size, lengths.max(initial=0)) + 2 * band + 2
+    step = max(1, BLOCK_SIZE // columns)
+    for start in range(0, len(reads), step):
+        block = reads[start : start + step]
+        padded = np.zeros((columns, len(block)), dtype=dtype)
+        for number, read in enumerate(block):
+            padded[band + 1 : band + 1 + read.size, number] = read
+        distances[start : start + step] = _banded_levenshtein(
+            reference, padded, lengths[start : start + step], band)
+    return distances
+
+def levenshtein (reference, read, band = None):
+    """
+    Function to compute the edit distance between two sequences, counting
+    substitutions, insertions and deletions
+
+    Parameters
+    ----------
+    reference : string, bytes or numpy.ndarray
+        the correct sequence.
+    read : string, bytes or numpy.ndarray
+        the sequence with errors.
+    band : int, optional
+        the largest distance to measure exactly; anything further is
+        reported as band + 1. The default measures every distance exactly.
+
+    Returns
+    -------
+    int
+        the edit distance.
+
+    """
+    return int(levenshtein_batch(reference, [read], band)[0])
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Jan  5 11:03:24 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import random
+import time
+
+import dna_info
+
+def _encrypt_decrypt_loop (user_input, key):
+    """
+    The original encrypt_decrypt, one pass and two sets per base for every
+    key character, kept as a baseline
+
+    Parameters
+    ----------
+    user_input : string
+        a DNA-encrypted message.
+    key : string
+        a key of DNA molecules.
+
+    Returns
+    -------
+    encryption : string
+        a XOR-encrypted DNA encryption.
+
+    """
+    encryption = user_input
+    for key_char in key:
+        key_set = set([key_char])
+        new_encryption = ""
+        for char in encryption:
+            char_set = set([char])
+            if key_set | char_set == set(['A']):
+                new_encryption += 'A'
+            elif key_set | char_set == set(['A', 'T']):
+                new_encryption += 'T'
+            elif key_set | char_set == set(['A', 'C']):
+                new_encryption += 'C'
+            elif key_set | char_set == set(['A', 'G']):
+                new_encryption += 'G'
+            elif key_set | char_set == set(['T']):
+                new_encryption += 'A'
+            elif key_set | char_set == set(['T', 'C']):
+                new_encryption += 'G'
+            elif key_set | char_set == set(['T', 'G']):
+                new_encryption += 'C'
+            elif key_set | char_set == set(['C']):
+                new_encryption += 'A'
+            elif key_set | char_set == set(['C', 'G']):
+                new_encryption += 'T'
+            elif key_set | char_set == set(['G']):
+                new_encryption += 'A'
+        encryption = new_encryption
+    return encryption
+
+def _synthesizer_loop (sequence):
+    """
+    The original synthesizer, one random number and one if/elif ladder per
+    base, kept as a baseline
+
+    Parameters
+    ----------
+    sequence : string
+        a DNA sequence to synthesize.
+
+    Returns
+    -------
+    new_sequence : string
+        the synthesized sequence.
+
+    """
+    new_sequence = ""
+    for char in sequence:
+        random_num = random.randrange(1, 101, 1)
+        if char == 'A':
+            new_sequence += 'A'
+        elif char == 'T':
+            if random_num >= 1 and random_num <= 5:
+                new_sequence += 'A'
+            elif random_num >= 6 and random_num <= 95:
+                new_sequence += 'T'
+            elif random_num >= 96 and random_num <= 98:
+                new_sequence += 'C'
+            else:
+                new_sequence += 'G'
+        elif char == 'C':
+            if random_num == 1:
+                new_sequence += 'A'
+            elif random_num == 2:
+                new_sequence += 'T'
+            elif random_num >= 3 and random_num <= 99:
+                new_sequence += 'C'
+            else:
+                new_sequence += 'G'
+        elif char == 'G':
+            if random_num == 1:
+                new_sequence += 'A'
+            elif random_num == 2 or random_num == 3:
+                new_sequence += 'T'
+            elif random_num == 4 or random_num == 5:
+                new_sequence += 'C'
+            else:
+                new_sequence += 'G'
+    return new_sequence
+
+def _best_time (function, repeats = 3):
+    """
+    Function to time a function, keeping the fastest of several runs
+
+    Parameters
+    ----------
+    function : function
+        the function to time, called without arguments.
+    repeats : int, optional
+        the number of runs. The default is 3.
+
+    Returns
+    -------
+    float
+        the fastest time in seconds.
+
+    """
+    times = []
+    for num in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def benchmark_encrypt_decrypt (num_bases = 1_000_000,
+                               key_lengths = (1, 4, 16, 64, 256),
+                               loop_bases = 5_000):
+    """
+    Function to time encrypt_decrypt for growing keys, in both modes, next to
+    the original loop
+
+    Parameters
+    ----------
+    num_bases : int, optional
+        the length of the sequence. The default is 1,000,000.
+    key_lengths : tuple, optional
+        the key lengths to time. The default is (1, 4, 16, 64, 256).
+    loop_bases : int, optional
+        the length of the sequence for the much slower original loop. The
+        default is 5,000.
+
+    Returns
+    -------
+    results : list
+        a (key length, loop, substitution, keystream) tuple per key length,
+        each time in nanoseconds per base.
+
+    """
+    sequence = "".join(random.choices(dna_info.BASES, k=num_bases))
+    results = []
+    for key_length in key_lengths:
+        key = "".join(random.choices(dna_info.BASES, k=key_length))
+        loop = _best_time(lambda: _encrypt_decrypt_loop(
+            sequence[:loop_bases], key), 1) / loop_bases
+        substitution = _best_time(lambda: dna_info.encrypt_decrypt(
+            sequence, key)) / num_bases
+        keystream = _best_time(lambda: dna_info.encrypt_decrypt(
+            sequence, key, "keystream")) / num_bases
+        results.append((key_length, loop * 1e9, substitution * 1e9,
+                        keystream * 1e9))
+    return results
+
+def benchmark_synthesizer (num_bases = 1_000_000, loop_bases = 100_000):
+    """
+    Function to time the synthesizer next to the original loop
+
+    Parameters
+    ----------
+    num_bases : int, optional
+        the length of the sequence. The default is 1,000,000.
+    loop_bases : int, optional
+        the length of the sequence for the original loop. The default is
+        100,000.
+
+    Returns
+    -------
+    results : dict
+        the nanoseconds per base of the "loop", of "substitution" only and
+        of substitution with insertions and deletions, "indels".
+
+    """
+    sequence = "".join(random.choices(dna_info.BASES, k=num_bases))
+    results = {}
+    results["loop"] = _best_time(lambda: _synthesizer_loop(
+        sequence[:loop_bases]), 1) / loop_bases * 1e9
+    results["substitution"] = _best_time(lambda: dna_info.synthesizer(
+        sequence)) / num_bases * 1e9
+    results["indels"] = _best_time(lambda: dna_info.synthesizer(
+        sequence, insertion_rate=0.01, deletion_rate=0.01)) / num_bases * 1e9
+    return results
+
+def main ():
+    """
+    Runs the benchmarks and prints the results
+
+    Returns
+    -------
+    None.
+
+    """
+    print("encrypt_decrypt, ns per base")
+    print(f"{'key':>5} {'loop':>10} {'substitution':>13} {'keystream':>10}")
+    for key_length, loop, substitution, keystream in \
+            benchmark_encrypt_decrypt():
+        print(f"{key_length:>5} {loop:>10.1f} {substitution:>13.2f} "
+              f"{keystream:>10.2f}")
+    print()
+    print("synthesizer, ns per base")
+    for method, nanoseconds in benchmark_synthesizer().items():
+        print(f"{method:>13} {nanoseconds:>10.2f}")
+    return
+
+if __name__ == "__main__":
+    main()
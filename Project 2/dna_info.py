@@ -1,5 +1,3 @@
-import random
-
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
@@ -9,10 +7,115 @@ Created on Fri Jan  5 11:03:24 2024
 @JHED aalme2
 """
 
+import numpy as np
+
+# The DNA base for each pair of bits: 00=A, 01=T, 10=C, 11=G
+BASES = "ATCG"
+
+# The four bases of every byte, most significant pair of bits first
+BYTE_TO_BASES = ["".join(BASES[(byte >> shift) & 3] for shift in (6, 4, 2, 0))
+                 for byte in range(256)]
+
+# The byte encoded by every group of four bases
+BASES_TO_BYTE = {bases: byte for byte, bases in enumerate(BYTE_TO_BASES)}
+
+# The same table as 256 four-byte words, so one lookup writes four bases
+BYTE_TO_BASES_WORDS = np.frombuffer("".join(BYTE_TO_BASES).encode("ascii"),
+                                    dtype=np.uint32)
+
+# The base characters as bytes, indexed by their two-bit value
+BASE_CHARS = np.frombuffer(BASES.encode("ascii"), dtype=np.uint8)
+
+# The two-bit value of every base character, or 255 for anything else
+BASE_CODES = np.full(256, 255, dtype=np.uint8)
+BASE_CODES[BASE_CHARS] = np.arange(4)
+
+# The four-bit value of every pair of base characters read as a little-endian
+# 16-bit word, or 255 if either is not a base
+PAIR_CODES = np.full(1 << 16, 255, dtype=np.uint8)
+PAIR_CODES[[ord(first) | ord(second) << 8
+            for first in BASES for second in BASES]] = np.arange(16)
+
+# The tables which XOR every base with a given key base, two-bit values
+# combining as 00=A, 01=T, 10=C, 11=G so that e.g. T XOR C is G
+XOR_TABLES = {key_base: bytes.maketrans(
+                  BASES.encode("ascii"),
+                  "".join(BASES[code ^ BASES.index(key_base)]
+                          for code in range(4)).encode("ascii"))
+              for key_base in BASES}
+
+# Every byte which is not a base, removed when encrypting
+NON_BASE_BYTES = bytes(byte for byte in range(256)
+                       if chr(byte) not in BASES)
+
+# The probability of synthesizing each base (columns) when each base (rows)
+# is intended, both in the order A, T, C, G
+DEFAULT_ERROR_MATRIX = np.array([[1.00, 0.00, 0.00, 0.00],
+                                 [0.05, 0.90, 0.03, 0.02],
+                                 [0.01, 0.01, 0.97, 0.01],
+                                 [0.01, 0.02, 0.02, 0.95]])
+
+# The random number generator used when no seed is given
+_default_rng = np.random.default_rng()
+
+# Inputs of at least this many bytes are converted with NumPy
+VECTORIZE_THRESHOLD = 1 << 12
+
+def encode_bytes (data):
+    """
+    Function to encode bytes as DNA, four bases per byte
+
+    Parameters
+    ----------
+    data : bytes
+        the bytes to encode.
+
+    Returns
+    -------
+    string
+        the DNA sequence.
+
+    """
+    if len(data) < VECTORIZE_THRESHOLD:
+        return "".join(map(BYTE_TO_BASES.__getitem__, data))
+    #Look up all the bytes at once and read the words back as characters
+    words = BYTE_TO_BASES_WORDS[np.frombuffer(data, dtype=np.uint8)]
+    return words.tobytes().decode("ascii")
+
+def decode_bytes (sequence):
+    """
+    Function to decode a DNA sequence into the bytes it encodes
+
+    Parameters
+    ----------
+    sequence : string
+        the DNA sequence, a multiple of four bases long.
+
+    Returns
+    -------
+    bytes
+        the decoded bytes.
+
+    """
+    if len(sequence) % 4 != 0:
+        raise ValueError("A DNA sequence must be a multiple of 4 bases long")
+    if len(sequence) < 4 * VECTORIZE_THRESHOLD:
+        try:
+            return bytes(BASES_TO_BYTE[sequence[num : num + 4]]
+                         for num in range(0, len(sequence), 4))
+        except KeyError as error:
+            raise ValueError(f"Invalid DNA bases {error}") from None
+    #Look up two bases at a time, then join the halves of each byte
+    codes = PAIR_CODES[np.frombuffer(sequence.encode("latin-1", "replace"),
+                                     dtype="<u2")]
+    if (codes == 255).any():
+        raise ValueError("Invalid DNA base in sequence")
+    return ((codes[0::2] << 4) | codes[1::2]).tobytes()
+
 def encode_sequence (user_input):
     """
     Function to encrypt a message with DNA
-    
+
     Parameters
     ----------
     user_input : string
@@ -24,29 +127,9 @@ def encode_sequence (user_input):
         the encypted message.
 
     """
-    #Initialize the encoded message
-    dna_code = ""
-    #Iterate through each character in the message
-    for char in user_input:
-        #The binary number of the character for this iteration
-        binary_num = ""
-        #The ASCII value of the character
-        char_num = ord(char)
-        #Create an 8 digit binary value for the ASCII value
-        for num in range(7, -1, -1):
-            binary_num += str(char_num // (2 ** num))
-            char_num = (char_num % (2 ** num))
-        #Replace every 2 values with DNA molecules    
-        for num in range(0, len(binary_num), 2):
-            if binary_num[num : num + 2] == '00':
-                dna_code += 'A'
-            elif binary_num[num : num + 2] == '01':
-                dna_code += 'T'
-            elif binary_num[num : num + 2] == '10':
-                dna_code += 'C'
-            elif binary_num[num : num + 2] == '11':
-                dna_code += 'G'
-    return dna_code
+    #Every UTF-8 byte of the message becomes four bases, so any character
+    #can be encoded
+    return encode_bytes(user_input.encode("utf-8"))
 
 def decode_sequence (user_input):
     """
@@ -60,34 +143,38 @@ def decode_sequence (user_input):
     Returns
     -------
     decoded_sequence : string
-        the decrypted message.
+        the decrypted message; bytes which are not valid UTF-8, e.g. after
+        synthesis errors, become replacement characters.
 
     """
-    #Initialize the decoded message
-    decoded_sequence = ""
-    #Iterate through every 4 letters as those combined are 1 number
-    for num in range(0, len(user_input), 4):
-        #Initialize the binary number for the given character
-        binary_num = ""
-        #Convert 4 characters into a binary number
-        for char in user_input[num : num + 4]:
-            if char == 'A':
-                binary_num += '00'
-            elif char == 'T':
-                binary_num += '01'
-            elif char == 'C':
-                binary_num += '10'
-            elif char == 'G':
-                binary_num += '11'    
-        char_num = 0
-        #Convert the binary number to a decimal number then a character
-        for index, char in enumerate(binary_num):
-            char_num += (2 ** (7 - index)) * int(char)
-        #Add the character to the decoded message    
-        decoded_sequence += chr(char_num)   
-    return decoded_sequence
-
-def encrypt_decrypt (user_input, key = "CAT"):
+    return decode_bytes(user_input).decode("utf-8", "replace")
+
+def collapse_key (key):
+    """
+    Function to combine a key into the single base with the same effect;
+    XOR is associative, so XOR with each key base in turn equals XOR with
+    the XOR of all of them
+
+    Parameters
+    ----------
+    key : string
+        a key of DNA molecules.
+
+    Returns
+    -------
+    string
+        the equivalent single base.
+
+    """
+    code = 0
+    for key_char in key:
+        if key_char not in BASES:
+            raise ValueError(f"Invalid DNA base {key_char!r} in key")
+        code ^= BASES.index(key_char)
+    return BASES[code]
+
+def encrypt_decrypt (user_input, key = "CAT", mode = "substitution",
+                     offset = 0):
     """
     Function to encrypt a DNA-encrypted message using the XOR method
 
@@ -97,51 +184,164 @@ def encrypt_decrypt (user_input, key = "CAT"):
         a DNA-encrypted message.
     key : string, optional
         a key of DNA molecules. The default is "CAT".
+    mode : string, optional
+        "substitution" XORs every base with every key base, i.e. with one
+        combined base; "keystream" XORs each base with one key base, the key
+        repeating along the sequence. The default is "substitution".
+    offset : int, optional
+        the position of the first base in the keystream, for encrypting a
+        long sequence in pieces. The default is 0.
 
     Returns
     -------
     encryption : string
-        a XOR-encrypted DNA encryption.
+        a XOR-encrypted DNA encryption; anything which is not a base is
+        left out.
 
     """
-    #Initialize the encryption with the user input
-    encryption = user_input
-    #Encrypt the message once for each character in the key
-    for key_char in key:
-        #A set to compare with the sequence key to determine encryption
-        key_set = set([key_char])
-        #The newly encrypted sequence
-        new_encryption = ""
-        #Encrypt each character in the sequence
-        for char in encryption:
-            #A set for the purpose of symmetric comparison
-            char_set = set([char])
-            if key_set | char_set == set(['A']):
-                new_encryption += 'A'
-            elif key_set | char_set == set(['A', 'T']):
-                new_encryption += 'T'
-            elif key_set | char_set == set(['A', 'C']):
-                new_encryption += 'C'
-            elif key_set | char_set == set(['A', 'G']):
-                new_encryption += 'G'
-            elif key_set | char_set == set(['T']):
-                new_encryption += 'A'
-            elif key_set | char_set == set(['T', 'C']):
-                new_encryption += 'G'
-            elif key_set | char_set == set(['T', 'G']):
-                new_encryption += 'C'    
-            elif key_set | char_set == set(['C']):    
-                new_encryption += 'A'
-            elif key_set | char_set == set(['C', 'G']):  
-                new_encryption += 'T'
-            elif key_set | char_set == set(['G']):  
-                new_encryption += 'A'
-        encryption = ""
-        #Add the character to the new sequence
-        encryption += new_encryption
-    return encryption   
-                
-def synthesizer (sequence):
+    data = user_input.encode("latin-1", "replace")
+    if mode == "substitution":
+        #One pass through a table, which also drops anything but the bases
+        return data.translate(XOR_TABLES[collapse_key(key)],
+                              NON_BASE_BYTES).decode("ascii")
+    if mode != "keystream":
+        raise ValueError(f"Unknown mode {mode!r}")
+    if not key:
+        raise ValueError("The key must contain at least one base")
+    key_codes = BASE_CODES[np.frombuffer(key.encode("latin-1", "replace"),
+                                         dtype=np.uint8)]
+    if (key_codes == 255).any():
+        raise ValueError("Invalid DNA base in key")
+    codes = BASE_CODES[np.frombuffer(data, dtype=np.uint8)]
+    codes = codes[codes != 255]
+    #Line the key up with the bases and XOR them all at once
+    keystream = np.tile(np.roll(key_codes, -offset),
+                        -(-codes.size // key_codes.size))[:codes.size]
+    return BASE_CHARS[codes ^ keystream].tobytes().decode("ascii")
+
+def sequence_codes (sequence):
+    """
+    Function to convert a DNA sequence into two-bit values, leaving out
+    anything which is not a base
+
+    Parameters
+    ----------
+    sequence : string
+        the DNA sequence.
+
+    Returns
+    -------
+    numpy.ndarray
+        the value from 0 to 3 of each base.
+
+    """
+    codes = BASE_CODES[np.frombuffer(sequence.encode("latin-1", "replace"),
+                                     dtype=np.uint8)]
+    return codes[codes != 255]
+
+def codes_sequence (codes):
+    """
+    Function to convert two-bit values into a DNA sequence
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        the value from 0 to 3 of each base.
+
+    Returns
+    -------
+    string
+        the DNA sequence.
+
+    """
+    return BASE_CHARS[codes].tobytes().decode("ascii")
+
+def cumulative_error_table (error_matrix = None):
+    """
+    Function to check a substitution matrix and turn it into the thresholds
+    used to draw from it
+
+    Parameters
+    ----------
+    error_matrix : array_like, optional
+        a 4x4 matrix where row i gives the probabilities of synthesizing each
+        base, in the order A, T, C, G, when base i is intended. The default
+        is DEFAULT_ERROR_MATRIX.
+
+    Returns
+    -------
+    numpy.ndarray
+        the 4x3 cumulative probabilities; a uniform number at or above the
+        j-th threshold of a row means a base after the j-th is synthesized.
+
+    """
+    if error_matrix is None:
+        error_matrix = DEFAULT_ERROR_MATRIX
+    error_matrix = np.asarray(error_matrix, dtype=np.float64)
+    if error_matrix.shape != (4, 4):
+        raise ValueError("The error matrix must be 4x4")
+    if (error_matrix < 0).any() or not np.allclose(error_matrix.sum(axis=1),
+                                                   1.0):
+        raise ValueError("Each row of the error matrix must be probabilities "
+                         "summing to 1")
+    return np.cumsum(error_matrix, axis=1)[:, :3]
+
+def synthesize_codes (codes, error_matrix = None, insertion_rate = 0.0,
+                      deletion_rate = 0.0, seed = None):
+    """
+    Function to model the fallible synthesization of DNA given as two-bit
+    values
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        the value from 0 to 3 of each base; a 2D array synthesizes one
+        strand per row, which needs both indel rates to be zero.
+    error_matrix : array_like, optional
+        the 4x4 substitution probabilities, see cumulative_error_table. The
+        default is DEFAULT_ERROR_MATRIX.
+    insertion_rate : float, optional
+        the probability of a random base being inserted after each base. The
+        default is 0.0.
+    deletion_rate : float, optional
+        the probability of each base being left out. The default is 0.0.
+    seed : int or numpy.random.Generator, optional
+        the seed or generator of the random numbers. The default is a
+        generator shared by the module.
+
+    Returns
+    -------
+    numpy.ndarray
+        the values of the synthesized bases.
+
+    """
+    rng = _default_rng if seed is None else np.random.default_rng(seed)
+    codes = np.asarray(codes, dtype=np.uint8)
+    cumulative = cumulative_error_table(error_matrix)
+    indels = insertion_rate > 0 or deletion_rate > 0
+    if indels and codes.ndim != 1:
+        raise ValueError("Insertions and deletions need a single strand")
+    #All the random numbers of the strand come from a single call
+    draws = rng.random((3,) + codes.shape if indels else codes.shape)
+    substitutions = draws[0] if indels else draws
+    #Count the thresholds each number reaches to find the synthesized base
+    synthesized = (substitutions >= cumulative[:, 0][codes]).view(np.uint8)
+    synthesized += substitutions >= cumulative[:, 1][codes]
+    synthesized += substitutions >= cumulative[:, 2][codes]
+    if not indels:
+        return synthesized
+    kept = draws[1] >= deletion_rate
+    inserted = draws[2] < insertion_rate
+    #A number below the insertion rate, scaled back up, picks the new base
+    new_bases = np.minimum(draws[2] / max(insertion_rate, 1e-300) * 4,
+                           3).astype(np.uint8)
+    #Each position yields its base if kept, then its insertion if any
+    pairs = np.stack((synthesized, new_bases), axis=1)
+    mask = np.stack((kept, inserted), axis=1)
+    return pairs[mask]
+
+def synthesizer (sequence, error_matrix = None, insertion_rate = 0.0,
+                 deletion_rate = 0.0, seed = None):
     """
     A function to model the fallible synthesization of DNA
 
@@ -149,6 +349,18 @@ def synthesizer (sequence):
     ----------
     sequence : string
         a DNA sequence to synthesize.
+    error_matrix : array_like, optional
+        a 4x4 matrix where row i gives the probabilities of synthesizing each
+        base, in the order A, T, C, G, when base i is intended. The default
+        is DEFAULT_ERROR_MATRIX.
+    insertion_rate : float, optional
+        the probability of a random base being inserted after each base. The
+        default is 0.0.
+    deletion_rate : float, optional
+        the probability of each base being left out. The default is 0.0.
+    seed : int or numpy.random.Generator, optional
+        the seed or generator, for reproducible results. The default is a
+        generator shared by the module.
 
     Returns
     -------
@@ -156,45 +368,9 @@ def synthesizer (sequence):
         the synthesized sequence.
 
     """
-    #Initialize the new sequence
-    new_sequence = ""
-    #Synthesizes each character in the sequence
-    for char in sequence:
-        #Generates a random to use in the probabilities of error
-        random_num = random.randrange(1, 101, 1)
-        #Depending on the character and the random number, a given character
-        #is synthesized. Ranges of numbers in the conditionals correspond to
-        #error probabilities
-        if char == 'A':
-            new_sequence += 'A'
-        elif char == 'T':
-            if random_num >= 1 and random_num <= 5:
-                new_sequence += 'A'
-            elif random_num >= 6 and random_num <= 95:
-                new_sequence += 'T'
-            elif random_num >= 96 and random_num <= 98:
-                new_sequence += 'C'
-            else:
-                new_sequence += 'G'
-        elif char == 'C':
-            if random_num == 1:
-                new_sequence += 'A'
-            elif random_num == 2:
-                new_sequence += 'T'
-            elif random_num >= 3 and random_num <= 99:
-                new_sequence += 'C'
-            else:
-                new_sequence += 'G'
-        elif char == 'G':
-            if random_num == 1:
-                new_sequence += 'A'
-            elif random_num == 2 or random_num == 3:
-                new_sequence += 'T'
-            elif random_num == 4 or random_num == 5:
-                new_sequence += 'C'
-            else:
-                new_sequence += 'G'
-    return new_sequence
+    return codes_sequence(synthesize_codes(sequence_codes(sequence),
+                                           error_matrix, insertion_rate,
+                                           deletion_rate, seed))
 
 def error_count (string_1, string_2):  
     """
@@ -205,7 +381,7 @@ def error_count (string_1, string_2):
     string_1 : string
         the correct string.
     string_2 : string
-        the string with errors.
+        the string with errors, of the same length.
 
     Returns
     -------
@@ -213,16 +389,90 @@ def error_count (string_1, string_2):
         the number of errors.
 
     """
-    #Initialize the number of errors
-    num_mismatches = 0
-    #Iterates through each character
-    for index, char in enumerate(string_1):
-        #Increments the error count
-        if char != string_2[index]:
-            num_mismatches += 1
-    return num_mismatches
-
-def redundancy (num, sequence):
+    #Imported here as distance builds on packed_dna, which builds on this
+    #module
+    import distance
+
+    return distance.hamming(string_1, string_2)
+
+class ConsensusCounter:
+
+    """Class for counting the bases synthesized at each position"""
+
+    def __init__(self, length):
+        """
+        Initializes the counts of a sequence
+
+        Parameters
+        ----------
+        length : int
+            the number of bases in the sequence.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.length = length
+        #Index 0=A, 1=T, 2=C, 3=G at each position
+        self.counts = np.zeros((length, 4), dtype=np.int64)
+        self.num_replicates = 0
+        self._offsets = np.arange(length) * 4
+        return
+
+    def add (self, replicates):
+        """
+        Method to count the bases of one or more synthesized replicates
+
+        Parameters
+        ----------
+        replicates : numpy.ndarray
+            the two-bit values of a replicate, or one replicate per row.
+
+        Returns
+        -------
+        None.
+
+        """
+        replicates = np.asarray(replicates)
+        if replicates.ndim == 1:
+            replicates = replicates[None, :]
+        if replicates.shape[1] != self.length:
+            raise ValueError("A replicate must be as long as the sequence")
+        self.counts += np.bincount(
+            (self._offsets + replicates).reshape(-1),
+            minlength=4 * self.length).reshape(self.length, 4)
+        self.num_replicates += replicates.shape[0]
+        return
+
+    def consensus (self):
+        """
+        Method to pick the most frequent base at each position; ties go to
+        the first of A, T, C, G
+
+        Returns
+        -------
+        numpy.ndarray
+            the two-bit values of the consensus sequence.
+
+        """
+        return np.argmax(self.counts, axis=1).astype(np.uint8)
+
+    def confidence (self):
+        """
+        Method to find the share of the replicates agreeing with the
+        consensus at each position
+
+        Returns
+        -------
+        numpy.ndarray
+            a value from 0 to 1 per position.
+
+        """
+        return self.counts.max(axis=1) / max(self.num_replicates, 1)
+
+def redundancy (num, sequence, error_matrix = None, seed = None,
+                return_confidence = False, batch_size = 64):
     """
     Synthesizes multiple times and picks the likely molecule to reduce error
 
@@ -232,44 +482,38 @@ def redundancy (num, sequence):
         the number of synthesis trials.
     sequence : string
         the DNA sequence to synthesize.
+    error_matrix : array_like, optional
+        the 4x4 substitution probabilities of the synthesizer. The default
+        is DEFAULT_ERROR_MATRIX.
+    seed : int or numpy.random.Generator, optional
+        the seed or generator, for reproducible results. The default is a
+        generator shared by the module.
+    return_confidence : bool, optional
+        whether to also return the confidence of each position. The default
+        is False.
+    batch_size : int, optional
+        the number of replicates synthesized and counted at a time, which
+        bounds the memory used whatever num is. The default is 64.
 
     Returns
     -------
     corrected_sequence : string
         the correct DNA-encrypted sequence.
+    confidence : numpy.ndarray
+        the share of the trials agreeing with each base of the corrected
+        sequence, only if return_confidence is True.
 
     """
-    #Initialize a list to store all the synthesized sequences
-    sequences = []
-    #Initialize the corrected sequence
-    corrected_sequence = ""
-    #Generate synthesized sequences
-    for num in range(0, num, 1):
-        sequences.append(synthesizer(sequence))
-    #Correct each character one at a time    
-    for num in range(0, len(sequence), 1):
-        #A list to store character frequencies where index 1=A, 2=T, 3=C, 4=G
-        frequencies = [0] * 4
-        #Count the occurence of each letter in the place of the given index
-        for entry in sequences:
-            if entry[num] == 'A':
-                frequencies[0] += 1
-            elif entry[num] == 'T':
-                frequencies[1] += 1
-            elif entry[num] == 'C':
-                frequencies[2] += 1
-            elif entry[num] == 'G':
-                frequencies[3] += 1
-        #Find the index, thus DNA molecule, that occurs the most        
-        maximum = frequencies.index(max(frequencies))
-        #Add the molecule to the sequence
-        if maximum == 0:
-            corrected_sequence += 'A'
-        elif maximum == 1:
-            corrected_sequence += 'T'
-        elif maximum == 2:
-            corrected_sequence += 'C'
-        elif maximum == 3:
-            corrected_sequence += 'G'
+    codes = sequence_codes(sequence)
+    rng = _default_rng if seed is None else np.random.default_rng(seed)
+    counter = ConsensusCounter(codes.size)
+    #Synthesize the trials a batch at a time, counting each batch as it is
+    #produced so only the counts are kept
+    for start in range(0, num, batch_size):
+        batch = np.broadcast_to(codes, (min(batch_size, num - start),
+                                        codes.size))
+        counter.add(synthesize_codes(batch, error_matrix, seed=rng))
+    corrected_sequence = codes_sequence(counter.consensus())
+    if return_confidence:
+        return corrected_sequence, counter.confidence()
     return corrected_sequence
-        
\ No newline at end of file
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Jan  5 11:03:24 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import argparse
+import multiprocessing
+import time
+import traceback
+
+import numpy as np
+
+import dna_info
+
+# The number of message bytes read and carried through the stages at a time
+CHUNK_SIZE = 1 << 16
+
+# The number of chunks which may wait between two stages
+QUEUE_SIZE = 4
+
+def _encode (index, payload, settings):
+    """
+    Stage to encode a chunk of the message as DNA
+
+    Parameters
+    ----------
+    index : int
+        the number of the chunk.
+    payload : bytes
+        the chunk of the message.
+    settings : dict
+        the settings of the pipeline.
+
+    Returns
+    -------
+    string
+        the DNA sequence of the chunk.
+
+    """
+    return dna_info.encode_bytes(payload)
+
+def _crypt (index, payload, settings):
+    """
+    Stage to XOR-encrypt or decrypt the DNA of a chunk; in keystream mode
+    the key carries on from where the previous chunk left it
+
+    Parameters
+    ----------
+    index : int
+        the number of the chunk.
+    payload : string
+        the DNA sequence of the chunk.
+    settings : dict
+        the settings of the pipeline.
+
+    Returns
+    -------
+    string
+        the encrypted or decrypted DNA sequence.
+
+    """
+    #Every chunk but the last is full, four bases to the byte
+    offset = index * settings["chunk_size"] * 4
+    return dna_info.encrypt_decrypt(payload, settings["key"],
+                                    settings["mode"], offset)
+
+def _synthesize (index, payload, settings):
+    """
+    Stage to synthesize the DNA of a chunk several times and correct it by
+    consensus
+
+    Parameters
+    ----------
+    index : int
+        the number of the chunk.
+    payload : string
+        the DNA sequence of the chunk.
+    settings : dict
+        the settings of the pipeline.
+
+    Returns
+    -------
+    string
+        the corrected DNA sequence.
+
+    """
+    #Each chunk has its own stream derived from the seed and its number, so
+    #the output does not depend on how the chunks are scheduled
+    rng = np.random.default_rng(np.random.SeedSequence(
+        settings["seed"], spawn_key=(index,)))
+    return dna_info.redundancy(settings["redundancy"], payload,
+                               settings["error_matrix"], seed=rng)
+
+def _decode (index, payload, settings):
+    """
+    Stage to decode the DNA of a chunk back into the message
+
+    Parameters
+    ----------
+    index : int
+        the number of the chunk.
+    payload : string
+        the DNA sequence of the chunk.
+    settings : dict
+        the settings of the pipeline.
+
+    Returns
+    -------
+    bytes
+        the chunk of the message.
+
+    """
+    return dna_info.decode_bytes(payload)
+
+# The stages every chunk goes through, in order
+STAGES = [("encode", _encode), ("encrypt", _crypt),
+          ("synthesize", _synthesize), ("decrypt", _crypt),
+          ("decode", _decode)]
+
+def read_chunks (input_file, chunk_size = CHUNK_SIZE):
+    """
+    Generator of the fixed-size chunks of a file
+
+    Parameters
+    ----------
+    input_file : str
+        the name of the file.
+    chunk_size : int, optional
+        the number of bytes per chunk. The default is CHUNK_SIZE.
+
+    Yields
+    ------
+    bytes
+        the next chunk, only the last of which may be shorter.
+
+    """
+    with open(input_file, 'rb') as my_file:
+        while True:
+            chunk = my_file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+def _new_counters ():
+    """
+    Function to start the throughput counters of a stage
+
+    Returns
+    -------
+    dict
+        no chunks, bytes or seconds yet.
+
+    """
+    return {"chunks": 0, "bytes": 0, "seconds": 0.0}
+
+def pipeline (chunks, key = "CAT", mode = "keystream", redundancy = 5,
+              error_matrix = None, seed = 0, chunk_size = CHUNK_SIZE,
+              counters = None):
+    """
+    Generator passing each chunk of a message through every stage in this
+    process, one chunk at a time
+
+    Parameters
+    ----------
+    chunks : iterable
+        the chunks of the message, all of chunk_size bytes but the last.
+    key : string, optional
+        a key of DNA molecules. The default is "CAT".
+    mode : string, optional
+        the encrypt_decrypt mode. The default is "keystream".
+    redundancy : int, optional
+        the number of synthesis trials per chunk. The default is 5.
+    error_matrix : array_like, optional
+        the 4x4 substitution probabilities of the synthesizer. The default
+        is DEFAULT_ERROR_MATRIX.
+    seed : int, optional
+        the seed of the synthesis. The default is 0.
+    chunk_size : int, optional
+        the number of bytes per chunk. The default is CHUNK_SIZE.
+    counters : dict, optional
+        the counters of each stage, by name, to add to. The default is
+        none.
+
+    Yields
+    ------
+    bytes
+        the message recovered from each chunk.
+
+    """
+    settings = _settings(key, mode, redundancy, error_matrix, seed,
+                         chunk_size)
+    if counters is not None:
+        for name, function in STAGES:
+            counters.setdefault(name, _new_counters())
+    for index, chunk in enumerate(chunks):
+        payload = chunk
+        for name, function in STAGES:
+            start = time.perf_counter()
+            payload = function(index, payload, settings)
+            if counters is not None:
+                counters[name]["chunks"] += 1
+                counters[name]["bytes"] += len(chunk)
+                counters[name]["seconds"] += time.perf_counter() - start
+        yield payload
+
+def _settings (key, mode, redundancy, error_matrix, seed, chunk_size):
+    """
+    Function to check the settings of a pipeline and gather them for the
+    stages
+
+    Parameters
+    ----------
+    key : string
+        a key of DNA molecules.
+    mode : string
+        the encrypt_decrypt mode.
+    redundancy : int
+        the number of synthesis trials per chunk.
+    error_matrix : array_like
+        the 4x4 substitution probabilities, or None for the default.
+    seed : int
+        the seed of the synthesis, or None for a fresh one.
+    chunk_size : int
+        the number of bytes per chunk.
+
+    Returns
+    -------
+    dict
+        the settings.
+
+    """
+    if redundancy < 1:
+        raise ValueError("The redundancy must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be at least 1")
+    dna_info.cumulative_error_table(error_matrix)
+    dna_info.encrypt_decrypt("", key, mode)
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    return {"key": key, "mode": mode, "redundancy": redundancy,
+            "error_matrix": (None if error_matrix is None else
+                             np.asarray(error_matrix).tolist()),
+            "seed": seed, "chunk_size": chunk_size}
+
+def _read_worker (input_file, chunk_size, outbox, reports):
+    """
+    Worker reading the chunks of the input into the first queue
+
+    Parameters
+    ----------
+    input_file : str
+        the name of the input file.
+    chunk_size : int
+        the number of bytes per chunk.
+    outbox : multiprocessing.Queue
+        the queue of the first stage.
+    reports : multiprocessing.Queue
+        the queue of the stage counters.
+
+    Returns
+    -------
+    None.
+
+    """
+    counters = _new_counters()
+    error = None
+    try:
+        chunks = read_chunks(input_file, chunk_size)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            counters["seconds"] += time.perf_counter() - start
+            if chunk is None:
+                break
+            outbox.put((counters["chunks"], len(chunk), chunk))
+            counters["chunks"] += 1
+            counters["bytes"] += len(chunk)
+    except Exception:
+        error = traceback.format_exc()
+    outbox.put(None)
+    reports.put(("read", counters, error))
+    return
+
+def _stage_worker (name, function, settings, inbox, outbox, reports):
+    """
+    Worker running one stage on every chunk from its queue, passing the
+    results on to the next; after a failure it keeps emptying its queue so
+    the stages before it are never left blocked
+
+    Parameters
+    ----------
+    name : str
+        the name of the stage.
+    function : function
+        the stage.
+    settings : dict
+        the settings of the pipeline.
+    inbox : multiprocessing.Queue
+        the queue of chunks to process, ending with None.
+    outbox : multiprocessing.Queue
+        the queue of the next stage.
+    reports : multiprocessing.Queue
+        the queue of the stage counters.
+
+    Returns
+    -------
+    None.
+
+    """
+    counters = _new_counters()
+    error = None
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+        if error is not None:
+            continue
+        index, num_bytes, payload = item
+        start = time.perf_counter()
+        try:
+            payload = function(index, payload, settings)
+        except Exception:
+            error = traceback.format_exc()
+            continue
+        counters["seconds"] += time.perf_counter() - start
+        counters["chunks"] += 1
+        counters["bytes"] += num_bytes
+        outbox.put((index, num_bytes, payload))
+    outbox.put(None)
+    reports.put((name, counters, error))
+    return
+
+def run_pipeline (input_file, output_file, key = "CAT", mode = "keystream",
+                  redundancy = 5, error_matrix = None, seed = 0,
+                  chunk_size = CHUNK_SIZE, queue_size = QUEUE_SIZE):
+    """
+    Function to store a file as DNA and read it back, chunk by chunk; the
+    reading and every stage run in their own process, joined by bounded
+    queues, so the stages overlap and only a few chunks are held at once
+
+    Parameters
+    ----------
+    input_file : str
+        the name of the message file.
+    output_file : str
+        the name of the file for the recovered message.
+    key : string, optional
+        a key of DNA molecules. The default is "CAT".
+    mode : string, optional
+        the encrypt_decrypt mode. The default is "keystream".
+    redundancy : int, optional
+        the number of synthesis trials per chunk. The default is 5.
+    error_matrix : array_like, optional
+        the 4x4 substitution probabilities of the synthesizer. The default
+        is DEFAULT_ERROR_MATRIX.
+    seed : int, optional
+        the seed of the synthesis, or None for a fresh one. The default is
+        0.
+    chunk_size : int, optional
+        the number of bytes per chunk. The default is CHUNK_SIZE.
+    queue_size : int, optional
+        the number of chunks which may wait between two stages. The default
+        is QUEUE_SIZE.
+
+    Returns
+    -------
+    counters : dict
+        the chunks, message bytes and busy seconds of each stage, by name,
+        and the wall clock seconds of the whole run under "total".
+
+    """
+    settings = _settings(key, mode, redundancy, error_matrix, seed,
+                         chunk_size)
+    start = time.perf_counter()
+    queues = [multiprocessing.Queue(queue_size)
+              for num in range(len(STAGES) + 1)]
+    reports = multiprocessing.Queue()
+    workers = [multiprocessing.Process(
+        target=_read_worker,
+        args=(input_file, chunk_size, queues[0], reports))]
+    for number, (name, function) in enumerate(STAGES):
+        workers.append(multiprocessing.Process(
+            target=_stage_worker,
+            args=(name, function, settings, queues[number],
+                  queues[number + 1], reports)))
+    counters = {"write": _new_counters()}
+    errors = []
+    #Open the output before any worker starts, and stop the workers on any
+    #error here, as nothing else empties the queues they would block on
+    with open(output_file, 'wb') as my_file:
+        finished = False
+        try:
+            for worker in workers:
+                worker.start()
+            #The stages keep the chunks in order, so they are written as
+            #they come
+            while True:
+                item = queues[-1].get()
+                if item is None:
+                    break
+                index, num_bytes, payload = item
+                write_start = time.perf_counter()
+                my_file.write(payload)
+                counters["write"]["seconds"] += (time.perf_counter() -
+                                                 write_start)
+                counters["write"]["chunks"] += 1
+                counters["write"]["bytes"] += num_bytes
+            for num in workers:
+                name, stage_counters, error = reports.get()
+                counters[name] = stage_counters
+                if error is not None:
+                    errors.append(f"{name} stage failed:\n{error}")
+            finished = True
+        finally:
+            for worker in workers:
+                if not finished and worker.is_alive():
+                    worker.terminate()
+                if worker.pid is not None:
+                    worker.join()
+    if errors:
+        raise RuntimeError("\n".join(errors))
+    counters["total"] = {"chunks": counters["write"]["chunks"],
+                         "bytes": counters["write"]["bytes"],
+                         "seconds": time.perf_counter() - start}
+    return counters
+
+def format_report (counters):
+    """
+    Function to lay out the throughput of each stage as a table
+
+    Parameters
+    ----------
+    counters : dict
+        the counters of each stage, by name.
+
+    Returns
+    -------
+    str
+        one line per stage with its chunks, megabytes of the message, busy
+        seconds and megabytes per second.
+
+    """
+    order = ["read"] + [name for name, function in STAGES] + ["write",
+                                                              "total"]
+    lines = [f"{'stage':>10} {'chunks':>8} {'MB':>10} {'seconds':>10} "
+             f"{'MB/s':>10}"]
+    for name in order:
+        if name not in counters:
+            continue
+        stage = counters[name]
+        megabytes = stage["bytes"] / 1e6
+        rate = megabytes / stage["seconds"] if stage["seconds"] else 0.0
+        lines.append(f"{name:>10} {stage['chunks']:>8} {megabytes:>10.2f} "
+                     f"{stage['seconds']:>10.3f} {rate:>10.2f}")
+    return "\n".join(lines)
+
+def main (argv = None):
+    """
+    Command line entry point for running a file through the pipeline
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments. The default is sys.argv[1:].
+
+    Returns
+    -------
+    None.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Encode, encrypt, synthesize, correct, decrypt and "
+        "decode a file as DNA")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("--key", default="CAT")
+    parser.add_argument("--mode", choices=["substitution", "keystream"],
+                        default="keystream")
+    parser.add_argument("--redundancy", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--serial", action="store_true",
+                        help="run every stage in this process")
+    args = parser.parse_args(argv)
+    if args.serial:
+        start = time.perf_counter()
+        counters = {}
+        with open(args.output_file, 'wb') as my_file:
+            for payload in pipeline(read_chunks(args.input_file,
+                                                args.chunk_size),
+                                    args.key, args.mode, args.redundancy,
+                                    None, args.seed, args.chunk_size,
+                                    counters):
+                my_file.write(payload)
+        counters["total"] = dict(counters.get("decode", _new_counters()),
+                                 seconds=time.perf_counter() - start)
+    else:
+        counters = run_pipeline(args.input_file, args.output_file, args.key,
+                                args.mode, args.redundancy, None, args.seed,
+                                args.chunk_size, args.queue_size)
+    print(format_report(counters))
+    return
+
+if __name__ == "__main__":
+    main()
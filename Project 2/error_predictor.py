@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Jan  5 11:03:24 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import functools
+import math
+
+import numpy as np
+
+import dna_info
+
+# Probabilities below this share of the largest term are left out
+_NEGLIGIBLE = 1e-18
+
+def _log_binomial_pmf (num, k, p):
+    """
+    Function to compute the log probability of k successes in num trials
+
+    Parameters
+    ----------
+    num : int
+        the number of trials.
+    k : numpy.ndarray
+        the numbers of successes.
+    p : float
+        the probability of success.
+
+    Returns
+    -------
+    numpy.ndarray
+        the log probabilities, -inf where impossible.
+
+    """
+    lgamma = np.vectorize(math.lgamma, otypes=[float])
+    log_choose = math.lgamma(num + 1) - lgamma(k + 1) - lgamma(num - k + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_p = np.where(k > 0, k * np.log(p), 0.0)
+        log_q = np.where(num - k > 0, (num - k) * np.log1p(-p), 0.0)
+    return log_choose + log_p + log_q
+
+def _poisson_pmf (rate, limit):
+    """
+    Function to compute the Poisson probabilities of 0 to limit events
+
+    Parameters
+    ----------
+    rate : float
+        the expected number of events.
+    limit : int
+        the largest number of events.
+
+    Returns
+    -------
+    numpy.ndarray
+        the probabilities, empty if limit is negative.
+
+    """
+    counts = np.arange(limit + 1)
+    if rate == 0:
+        return (counts == 0).astype(np.float64)
+    return np.exp(counts * math.log(rate) - rate
+                  - np.vectorize(math.lgamma, otypes=[float])(counts + 1))
+
+def _probability_others_within (probabilities, limits, total):
+    """
+    Function to compute the probability that the counts of a multinomial
+    draw all stay within their limits; the multinomial is written as
+    independent Poisson counts conditioned on their sum, which turns the
+    sum over all outcomes into a convolution
+
+    Parameters
+    ----------
+    probabilities : numpy.ndarray
+        the probability of each outcome, summing to 1.
+    limits : list
+        the largest allowed count of each outcome.
+    total : int
+        the number of draws.
+
+    Returns
+    -------
+    float
+        the probability.
+
+    """
+    if min(limits) < 0 or sum(limits) < total:
+        return 0.0
+    product = np.ones(1)
+    for probability, limit in zip(probabilities, limits):
+        product = np.convolve(product,
+                              _poisson_pmf(probability * total,
+                                           min(limit, total)))[:total + 1]
+    if product.size <= total:
+        return 0.0
+    #Undo the Poisson normalization, total! e^total / total^total
+    return float(product[total] * math.exp(math.lgamma(total + 1) + total
+                                           - total * math.log(total)))
+
+def _correct_probability (row, base, num):
+    """
+    Function to compute the probability that the plurality vote of num
+    synthesized copies of a base picks that base; as in redundancy, a tie
+    goes to the first of A, T, C, G
+
+    Parameters
+    ----------
+    row : numpy.ndarray
+        the probability of synthesizing each base when base is intended.
+    base : int
+        the index of the intended base.
+    num : int
+        the number of synthesized copies.
+
+    Returns
+    -------
+    float
+        the probability of a correct vote.
+
+    """
+    p = row[base]
+    others = [index for index in range(4) if index != base]
+    counts = np.arange(num + 1)
+    weights = np.exp(_log_binomial_pmf(num, counts, p))
+    correct = 0.0
+    for k in counts[weights > _NEGLIGIBLE * weights.max()]:
+        k = int(k)
+        remaining = num - k
+        if remaining == 0:
+            #Every copy is the intended base, or there are no copies at all
+            #and the vote falls to A
+            correct += weights[k] * (k > 0 or base == 0)
+            continue
+        #Bases before the intended one win ties, so must stay below k
+        limits = [k - 1 if index < base else k for index in others]
+        conditional = row[others] / (1 - p)
+        correct += weights[k] * _probability_others_within(conditional,
+                                                           limits, remaining)
+    return min(correct, 1.0)
+
+@functools.lru_cache(maxsize=1024)
+def _error_probabilities (num, matrix):
+    """
+    Function to compute the vote error probabilities, remembered for every
+    number of copies and matrix
+
+    Parameters
+    ----------
+    num : int
+        the number of synthesized copies.
+    matrix : tuple
+        the 4x4 substitution matrix as nested tuples.
+
+    Returns
+    -------
+    numpy.ndarray
+        the error probability of each intended base.
+
+    """
+    matrix = np.array(matrix)
+    errors = np.array([1.0 - _correct_probability(matrix[base], base, num)
+                       for base in range(4)])
+    errors.flags.writeable = False
+    return errors
+
+def consensus_error_probabilities (num, error_matrix = None):
+    """
+    Function to compute the exact probability that redundancy picks the
+    wrong base, for each intended base
+
+    Parameters
+    ----------
+    num : int
+        the number of synthesis trials.
+    error_matrix : array_like, optional
+        the 4x4 substitution probabilities of the synthesizer. The default
+        is DEFAULT_ERROR_MATRIX.
+
+    Returns
+    -------
+    numpy.ndarray
+        the error probability when A, T, C or G is intended.
+
+    """
+    if num < 0:
+        raise ValueError("The number of trials cannot be negative")
+    dna_info.cumulative_error_table(error_matrix)
+    if error_matrix is None:
+        error_matrix = dna_info.DEFAULT_ERROR_MATRIX
+    matrix = tuple(map(tuple, np.asarray(error_matrix, dtype=np.float64)))
+    return _error_probabilities(int(num), matrix)
+
+def predict_errors (sequence, num, error_matrix = None):
+    """
+    Function to predict the number of errors error_count would find between
+    a sequence and its redundancy correction, without simulating it
+
+    Parameters
+    ----------
+    sequence : string
+        the DNA sequence.
+    num : int
+        the number of synthesis trials.
+    error_matrix : array_like, optional
+        the 4x4 substitution probabilities of the synthesizer. The default
+        is DEFAULT_ERROR_MATRIX.
+
+    Returns
+    -------
+    expected : float
+        the expected number of mismatches; divide by the length of the
+        sequence for the error rate.
+    variance : float
+        the variance of the number of mismatches, positions being
+        independent.
+
+    """
+    composition = np.bincount(dna_info.sequence_codes(sequence), minlength=4)
+    errors = consensus_error_probabilities(num, error_matrix)
+    expected = float(composition @ errors)
+    variance = float(composition @ (errors * (1 - errors)))
+    return expected, variance
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Jan  5 11:03:24 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import math
+
+import numpy as np
+
+import dna_info
+
+# The number of set bits of every byte
+POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)],
+                    dtype=np.uint8)
+
+def _pack (codes):
+    """
+    Function to pack two-bit base values four to a byte
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        the value from 0 to 3 of each base.
+
+    Returns
+    -------
+    numpy.ndarray
+        the packed bytes, first base in the highest bits.
+
+    """
+    codes = np.asarray(codes, dtype=np.uint8)
+    padded = np.zeros(-(-codes.size // 4) * 4, dtype=np.uint8)
+    padded[:codes.size] = codes
+    padded = padded.reshape(-1, 4)
+    return ((padded[:, 0] << 6) | (padded[:, 1] << 4) | (padded[:, 2] << 2)
+            | padded[:, 3])
+
+def _shift_left (data, bits):
+    """
+    Function to shift a packed buffer towards its start by a number of bits
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        the packed bytes.
+    bits : int
+        the number of bits, from 0 to 7.
+
+    Returns
+    -------
+    numpy.ndarray
+        the shifted bytes, as many as given.
+
+    """
+    if bits == 0:
+        return data.copy()
+    following = np.zeros_like(data)
+    following[:-1] = data[1:]
+    return (data << bits) | (following >> (8 - bits))
+
+def _shift_right (data, bits):
+    """
+    Function to shift a packed buffer away from its start by a number of bits
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        the packed bytes.
+    bits : int
+        the number of bits, from 1 to 7.
+
+    Returns
+    -------
+    numpy.ndarray
+        the shifted bytes, one more than given.
+
+    """
+    shifted = np.zeros(data.size + 1, dtype=np.uint8)
+    shifted[:-1] = data >> bits
+    shifted[1:] |= data << (8 - bits)
+    return shifted
+
+class PackedDNA:
+
+    """Class for storing DNA sequences with four bases per byte"""
+
+    __slots__ = ("_data", "_length")
+
+    def __init__(self, data = b"", length = None):
+        """
+        Initializes the sequence from packed bytes
+
+        Parameters
+        ----------
+        data : bytes or numpy.ndarray, optional
+            the packed bytes, first base in the highest bits. The default is
+            no bytes.
+        length : int, optional
+            the number of bases. The default is four per byte.
+
+        Returns
+        -------
+        None.
+
+        """
+        if isinstance(data, np.ndarray):
+            data = data.astype(np.uint8, copy=False)
+        else:
+            data = np.frombuffer(bytes(data), dtype=np.uint8)
+        if length is None:
+            length = 4 * data.size
+        if not 0 <= length <= 4 * data.size:
+            raise ValueError("Length does not fit in the packed bytes")
+        self._data = data[:-(-length // 4)].copy()
+        self._length = length
+        #Clear the unused bits of the last byte so equal sequences compare
+        #and hash the same
+        if length % 4:
+            self._data[-1] &= (0xFF << (8 - 2 * (length % 4))) & 0xFF
+        self._data.flags.writeable = False
+
+    @classmethod
+    def from_sequence (cls, sequence):
+        """
+        Method to pack a DNA string
+
+        Parameters
+        ----------
+        sequence : string
+            the bases, A, T, C or G.
+
+        Returns
+        -------
+        PackedDNA
+            the packed sequence.
+
+        """
+        codes = dna_info.BASE_CODES[np.frombuffer(
+            sequence.encode("latin-1", "replace"), dtype=np.uint8)]
+        if (codes == 255).any():
+            raise ValueError("Invalid DNA base in sequence")
+        return cls(_pack(codes), len(sequence))
+
+    @classmethod
+    def from_text (cls, text):
+        """
+        Method to encode a message, the packed form of encode_sequence
+
+        Parameters
+        ----------
+        text : string
+            the message.
+
+        Returns
+        -------
+        PackedDNA
+            the encoded message.
+
+        """
+        #The packed encoding of a byte is the byte itself
+        return cls(text.encode("utf-8"))
+
+    def to_bytes (self):
+        """
+        Method to get the packed bytes
+
+        Returns
+        -------
+        bytes
+            the packed bytes, the last one padded with zero bits.
+
+        """
+        return self._data.tobytes()
+
+    def to_text (self):
+        """
+        Method to decode the sequence as a message, the packed form of
+        decode_sequence
+
+        Returns
+        -------
+        string
+            the message.
+
+        """
+        if self._length % 4:
+            raise ValueError("A DNA message must be a multiple of 4 bases")
+        return self._data.tobytes().decode("utf-8", "replace")
+
+    def to_sequence (self):
+        """
+        Method to unpack the sequence into a DNA string
+
+        Returns
+        -------
+        string
+            the bases.
+
+        """
+        return dna_info.encode_bytes(self._data.tobytes())[:self._length]
+
+    def codes (self):
+        """
+        Method to unpack the sequence into two-bit values
+
+        Returns
+        -------
+        numpy.ndarray
+            the value from 0 to 3 of each base.
+
+        """
+        codes = np.stack((self._data >> 6, self._data >> 4, self._data >> 2,
+                          self._data), axis=1) & 3
+        return codes.reshape(-1)[:self._length]
+
+    @property
+    def nbytes (self):
+        """
+        Method to get the memory used by the bases
+
+        Returns
+        -------
+        int
+            the number of packed bytes.
+
+        """
+        return self._data.size
+
+    def __len__ (self):
+        """
+        Method to get the number of bases
+
+        Returns
+        -------
+        int
+            the length of the sequence.
+
+        """
+        return self._length
+
+    def __getitem__ (self, index):
+        """
+        Method to get a base or a subsequence
+
+        Parameters
+        ----------
+        index : int or slice
+            the position of a base, or a slice of positions.
+
+        Returns
+        -------
+        string or PackedDNA
+            the base for a position, or the packed subsequence for a slice.
+
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return PackedDNA(_pack(self.codes()[index]),
+                                 len(range(start, stop, step)))
+            length = max(0, stop - start)
+            if length == 0:
+                return PackedDNA()
+            #Move the first base of the slice to the top of the first byte
+            data = self._data[start // 4 : -(-stop // 4)]
+            return PackedDNA(_shift_left(data, 2 * (start % 4)), length)
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("PackedDNA index out of range")
+        shift = 6 - 2 * (index % 4)
+        return dna_info.BASES[(self._data[index // 4] >> shift) & 3]
+
+    def __add__ (self, other):
+        """
+        Method to concatenate two sequences
+
+        Parameters
+        ----------
+        other : PackedDNA
+            the sequence to append.
+
+        Returns
+        -------
+        PackedDNA
+            the joined sequence.
+
+        """
+        if not isinstance(other, PackedDNA):
+            return NotImplemented
+        offset = self._length % 4
+        if offset == 0:
+            data = np.concatenate((self._data, other._data))
+        else:
+            #Slide the other sequence into the free bits of the last byte
+            shifted = _shift_right(other._data, 2 * offset)
+            data = np.concatenate((self._data, shifted[1:]))
+            data[self._data.size - 1] |= shifted[0]
+        return PackedDNA(data, self._length + other._length)
+
+    def __xor__ (self, other):
+        """
+        Method to XOR-encrypt the sequence with a key, base by base; a base
+        XOR A is unchanged, so XOR with the same key decrypts. A string key
+        is a keystream, like dna_info.encrypt_decrypt with mode "keystream",
+        not its default "substitution" mode; see encrypt_decrypt for both
+
+        Parameters
+        ----------
+        other : PackedDNA or string
+            a sequence of the same length, or a key of bases repeated along
+            the sequence.
+
+        Returns
+        -------
+        PackedDNA
+            the encrypted sequence.
+
+        """
+        if isinstance(other, str):
+            other = PackedDNA.from_sequence(other)
+            if len(other) == 0:
+                raise ValueError("The key must contain at least one base")
+            #The key lines up with the bytes again after lcm(len, 4) bases,
+            #so that many bases packed once can be repeated along the buffer
+            period = math.lcm(len(other), 4)
+            pattern = _pack(np.tile(other.codes(), period // len(other)))
+            keystream = np.tile(pattern, -(-self._data.size // pattern.size))[
+                :self._data.size]
+        elif isinstance(other, PackedDNA):
+            if len(other) != self._length:
+                raise ValueError("Sequences must be the same length")
+            keystream = other._data
+        else:
+            return NotImplemented
+        return PackedDNA(self._data ^ keystream, self._length)
+
+    def encrypt_decrypt (self, key = "CAT", mode = "substitution",
+                         offset = 0):
+        """
+        Method to XOR-encrypt the sequence the same way as
+        dna_info.encrypt_decrypt
+
+        Parameters
+        ----------
+        key : string, optional
+            a key of DNA molecules. The default is "CAT".
+        mode : string, optional
+            "substitution" XORs every base with every key base, i.e. with one
+            combined base; "keystream" XORs each base with one key base, the
+            key repeating along the sequence. The default is "substitution".
+        offset : int, optional
+            the position of the first base in the keystream. The default is
+            0.
+
+        Returns
+        -------
+        PackedDNA
+            the encrypted sequence.
+
+        """
+        if mode == "substitution":
+            #The combined base repeated in all four positions of every byte
+            code = dna_info.BASES.index(dna_info.collapse_key(key))
+            return PackedDNA(self._data ^ np.uint8(code * 0x55), self._length)
+        if mode != "keystream":
+            raise ValueError(f"Unknown mode {mode!r}")
+        if not key:
+            raise ValueError("The key must contain at least one base")
+        offset %= len(key)
+        return self ^ (key[offset:] + key[:offset])
+
+    def mismatches (self, other):
+        """
+        Method to count the positions where two sequences differ
+
+        Parameters
+        ----------
+        other : PackedDNA
+            a sequence of the same length.
+
+        Returns
+        -------
+        int
+            the number of differing bases.
+
+        """
+        if len(other) != self._length:
+            raise ValueError("Sequences must be the same length")
+        difference = self._data ^ other._data
+        #One bit per base which is set when either of its bits differ
+        differing = (difference | (difference >> 1)) & 0x55
+        return int(POPCOUNT[differing].sum(dtype=np.int64))
+
+    def __eq__ (self, other):
+        """
+        A method to define equality between sequences
+
+        Parameters
+        ----------
+        other : PackedDNA
+            another sequence.
+
+        Returns
+        -------
+        Bool
+            True or false.
+
+        """
+        if not isinstance(other, PackedDNA):
+            return NotImplemented
+        return (self._length == other._length and
+                np.array_equal(self._data, other._data))
+
+    def __hash__ (self):
+        """
+        A method to hash sequences
+
+        Returns
+        -------
+        int
+            the hash code for the sequence.
+
+        """
+        return hash((self._length, self._data.tobytes()))
+
+    def __repr__ (self):
+        """
+        A method to represent a sequence as a string
+
+        Returns
+        -------
+        str
+            the constructor call for a short sequence, or its length.
+
+        """
+        if self._length <= 32:
+            return f"PackedDNA.from_sequence({self.to_sequence()!r})"
+        return f"<PackedDNA of {self._length} bases>"
+
+    def __str__ (self):
+        """
+        A method to represent a sequence as its bases
+
+        Returns
+        -------
+        str
+            the bases.
+
+        """
+        return self.to_sequence()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Jan  5 11:03:24 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+import dna_info
+
+# The substitution matrices swept over by default, by name
+ERROR_MODELS = {"default": dna_info.DEFAULT_ERROR_MATRIX}
+
+# The columns of the results, one row per replicate
+FIELDS = ["task", "redundancy", "length", "error_model", "replicate",
+          "errors", "error_rate"]
+
+def load_error_models (models_file):
+    """
+    Function to read named substitution matrices from a JSON file
+
+    Parameters
+    ----------
+    models_file : str
+        the name of a JSON file holding an object of 4x4 matrices, as lists
+        of rows, by name.
+
+    Returns
+    -------
+    error_models : dict
+        the substitution matrices, by name.
+
+    """
+    with open(models_file, 'r', encoding='utf-8') as my_file:
+        error_models = json.load(my_file)
+    if not isinstance(error_models, dict) or not error_models:
+        raise ValueError(f"{models_file} must hold an object of matrices "
+                         "by name")
+    for name, matrix in error_models.items():
+        #Check each matrix now rather than in the middle of the sweep
+        try:
+            dna_info.cumulative_error_table(matrix)
+        except (ValueError, TypeError) as error:
+            raise ValueError(f"Error model {name!r} in {models_file}: "
+                             f"{error}") from None
+    return error_models
+
+def sweep_tasks (redundancy_levels, lengths, error_models, replicates):
+    """
+    Function to list every simulation of a sweep
+
+    Parameters
+    ----------
+    redundancy_levels : list
+        the numbers of synthesis trials.
+    lengths : list
+        the numbers of bases in the random sequences.
+    error_models : dict
+        the substitution matrices, by name.
+    replicates : int
+        the number of simulations of each combination.
+
+    Returns
+    -------
+    tasks : list
+        a tuple (task, redundancy, length, error model name, matrix,
+        replicate) per simulation, numbered in order.
+
+    """
+    tasks = []
+    for name, matrix in error_models.items():
+        for length in lengths:
+            for level in redundancy_levels:
+                for replicate in range(replicates):
+                    tasks.append((len(tasks), level, length, name,
+                                  np.asarray(matrix).tolist(), replicate))
+    return tasks
+
+def _run_task (task, seed):
+    """
+    Function to simulate one random sequence through redundancy and count
+    its errors
+
+    Parameters
+    ----------
+    task : tuple
+        the task, as made by sweep_tasks.
+    seed : int
+        the seed of the whole sweep.
+
+    Returns
+    -------
+    dict
+        the results row.
+
+    """
+    index, level, length, name, matrix, replicate = task
+    #Each task has its own stream derived from the sweep seed and its number,
+    #so results do not depend on which worker runs it or in what order
+    rng = np.random.default_rng(np.random.SeedSequence(seed,
+                                                       spawn_key=(index,)))
+    sequence = dna_info.codes_sequence(
+        rng.integers(0, 4, length, dtype=np.uint8))
+    corrected = dna_info.redundancy(level, sequence, matrix, seed=rng)
+    errors = dna_info.error_count(sequence, corrected)
+    return {"task": index, "redundancy": level, "length": length,
+            "error_model": name, "replicate": replicate, "errors": errors,
+            "error_rate": errors / length}
+
+def _run_task_star (arguments):
+    """
+    Function to unpack the arguments of _run_task for Pool.imap_unordered
+
+    Parameters
+    ----------
+    arguments : tuple
+        the task and the seed.
+
+    Returns
+    -------
+    dict
+        the results row.
+
+    """
+    return _run_task(*arguments)
+
+def _read_checkpoint (checkpoint_file, config):
+    """
+    Function to read the rows finished by an earlier run of the same sweep
+
+    Parameters
+    ----------
+    checkpoint_file : str
+        the name of the checkpoint file.
+    config : dict
+        the settings of this sweep.
+
+    Returns
+    -------
+    rows : dict
+        the finished rows by task number.
+
+    """
+    rows = {}
+    if not os.path.exists(checkpoint_file):
+        with open(checkpoint_file, 'w', encoding='utf-8') as my_file:
+            my_file.write(json.dumps({"config": config}) + "\n")
+        return rows
+    with open(checkpoint_file, 'r', encoding='utf-8') as my_file:
+        header = json.loads(my_file.readline())
+        if header.get("config") != config:
+            raise ValueError(f"{checkpoint_file} belongs to a different "
+                             "sweep; delete it to start again")
+        line = ""
+        for line in my_file:
+            #A line cut short by an interruption is simply run again
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            rows[row["task"]] = row
+    #End a cut short line so the next row starts on a line of its own
+    if line and not line.endswith("\n"):
+        with open(checkpoint_file, 'a', encoding='utf-8') as my_file:
+            my_file.write("\n")
+    return rows
+
+def plot_sweep (rows, plot_file):
+    """
+    Function to plot the mean error rate against the redundancy level, one
+    line per error model and length
+
+    Parameters
+    ----------
+    rows : list
+        the results rows.
+    plot_file : str
+        the name of the image to save, e.g. "error_count.pdf".
+
+    Returns
+    -------
+    None.
+
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    groups = {}
+    for row in rows:
+        key = (row["error_model"], row["length"])
+        groups.setdefault(key, {}).setdefault(row["redundancy"], []).append(
+            row["error_rate"])
+    figure, axes = plt.subplots()
+    for (name, length), levels in sorted(groups.items()):
+        x = sorted(levels)
+        y = [np.mean(levels[level]) for level in x]
+        axes.plot(x, y, marker="o", label=f"{name}, {length} bases")
+    axes.set_xlabel("Redundancy")
+    axes.set_ylabel("Mean error rate")
+    axes.set_yscale("symlog", linthresh=1e-5)
+    axes.legend()
+    figure.tight_layout()
+    figure.savefig(plot_file)
+    plt.close(figure)
+    return
+
+def run_sweep (output_file, redundancy_levels = (1, 3, 5, 7, 9),
+               lengths = (1000,), error_models = None, replicates = 20,
+               seed = 0, processes = None, plot_file = None):
+    """
+    Function to run a Monte Carlo sweep of redundancy against its error rate
+    over a process pool; finished simulations are checkpointed next to the
+    output so an interrupted sweep resumes where it stopped
+
+    Parameters
+    ----------
+    output_file : str
+        the name of the CSV file of results, one row per simulation.
+    redundancy_levels : tuple, optional
+        the numbers of synthesis trials. The default is (1, 3, 5, 7, 9).
+    lengths : tuple, optional
+        the numbers of bases in the random sequences. The default is (1000,).
+    error_models : dict, optional
+        the substitution matrices, by name. The default is ERROR_MODELS.
+    replicates : int, optional
+        the number of simulations of each combination. The default is 20.
+    seed : int, optional
+        the seed of the sweep. The default is 0.
+    processes : int, optional
+        the number of worker processes. The default is the number of CPUs.
+    plot_file : str, optional
+        the name of the plot to save, or an empty string for no plot. The
+        default is the output file name with a ".pdf" extension.
+
+    Returns
+    -------
+    rows : list
+        the results rows, in task order.
+
+    """
+    if error_models is None:
+        error_models = ERROR_MODELS
+    tasks = sweep_tasks(redundancy_levels, lengths, error_models, replicates)
+    config = {"redundancy_levels": list(redundancy_levels),
+              "lengths": list(lengths),
+              "error_models": {name: np.asarray(matrix).tolist()
+                               for name, matrix in error_models.items()},
+              "replicates": replicates, "seed": seed}
+    checkpoint_file = output_file + ".checkpoint.jsonl"
+    rows = _read_checkpoint(checkpoint_file, config)
+    remaining = [(task, seed) for task in tasks if task[0] not in rows]
+    if remaining:
+        with multiprocessing.Pool(processes) as pool, \
+             open(checkpoint_file, 'a', encoding='utf-8') as my_file:
+            for row in pool.imap_unordered(_run_task_star, remaining):
+                rows[row["task"]] = row
+                #Flush every row so an interruption loses at most the tasks
+                #in progress
+                my_file.write(json.dumps(row) + "\n")
+                my_file.flush()
+    rows = [rows[task[0]] for task in tasks]
+    with open(output_file, 'w', newline='', encoding='utf-8') as my_file:
+        writer = csv.DictWriter(my_file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    if plot_file is None:
+        plot_file = os.path.splitext(output_file)[0] + ".pdf"
+    if plot_file:
+        plot_sweep(rows, plot_file)
+    return rows
+
+def main (argv = None):
+    """
+    Command line entry point for running a sweep
+
+    Parameters
+    ----------
+    argv : list, optional
+        the command line arguments. The default is sys.argv[1:].
+
+    Returns
+    -------
+    None.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Sweep redundancy levels against their error rates")
+    parser.add_argument("output_file")
+    parser.add_argument("--levels", type=int, nargs="+",
+                        default=[1, 3, 5, 7, 9])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1000])
+    parser.add_argument("--replicates", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--error-models", default=None,
+                        help="a JSON file of 4x4 substitution matrices by "
+                        "name")
+    parser.add_argument("--plot", default=None,
+                        help="the plot file, or an empty string for none; "
+                        "the default is the output file with a .pdf "
+                        "extension")
+    args = parser.parse_args(argv)
+    error_models = (None if args.error_models is None else
+                    load_error_models(args.error_models))
+    run_sweep(args.output_file, args.levels, args.lengths, error_models,
+              args.replicates, args.seed, args.processes, args.plot)
+    return
+
+if __name__ == "__main__":
+    main()
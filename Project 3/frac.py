@@ -7,13 +7,91 @@ Created on Sun Jan  7 12:23:54 2024
 @JHED aalme2
 """
 
+import math
+import numbers
+import sys
+
+# The shared fractions 0 and 1, filled in once the class exists
+_ZERO = None
+_ONE = None
+
+# The number of distinct denominators an accumulator holds before folding
+# them into its running partial sums
+ACCUMULATOR_TERMS = 1 << 10
+
+# The modulus and infinity of numeric hashes, so fractions hash like int and
+# fractions.Fraction
+_HASH_MODULUS = sys.hash_info.modulus
+_HASH_INF = sys.hash_info.inf
+
+def _coerce(value):
+    """
+    Function to turn an operand into a fraction
+
+    Parameters
+    ----------
+    value : Frac, int, numbers.Rational or float
+        the operand.
+
+    Returns
+    -------
+    Frac
+        the operand as a fraction, or NotImplemented for anything else,
+        including infinite and nan floats.
+
+    """
+    if isinstance(value, Frac):
+        return value
+    if isinstance(value, numbers.Rational):
+        return Frac(value.numerator, value.denominator)
+    if isinstance(value, float) and math.isfinite(value):
+        # Floats are binary fractions, so they convert exactly
+        return Frac(*value.as_integer_ratio())
+    return NotImplemented
+
 class Frac:
     
     """Class for representing and operating on fractions"""
     
-    def __init__(self, num, den):
+    # Only the numerator and denominator are stored, with no __dict__
+    __slots__ = ("num", "den")
+    
+    def __new__(cls, num, den = 1):
+        """
+        Creates the fraction in lowest terms with a positive denominator
+
+        Parameters
+        ----------
+        num : int
+            numerator.
+        den : int, optional
+            denominator. The default is 1.
+
+        Returns
+        -------
+        Frac
+            the fraction.
+
+        """
+        num = int(num)
+        den = int(den)
+        if den == 0:
+            raise ZeroDivisionError(f"Frac({num}, 0)")
+        # Carry the sign on the numerator
+        if den < 0:
+            num = -num
+            den = -den
+        divisor = math.gcd(num, den)
+        if divisor != 1:
+            num //= divisor
+            den //= divisor
+        return cls._from_reduced(num, den)
+    
+    @classmethod
+    def _from_reduced(cls, num, den):
         """
-        Initializes the fraction
+        Creates a fraction which is already in lowest terms with a positive
+        denominator, skipping the checks
 
         Parameters
         ----------
@@ -24,15 +102,91 @@ class Frac:
 
         Returns
         -------
-        None.
+        Frac
+            the fraction, shared for 0 and 1.
+
+        """
+        if den == 1 and (num == 0 or num == 1) and cls is Frac:
+            cached = _ONE if num else _ZERO
+            if cached is not None:
+                return cached
+        self = object.__new__(cls)
+        object.__setattr__(self, "num", num)
+        object.__setattr__(self, "den", den)
+        return self
+    
+    def __setattr__(self, name, value):
+        """
+        A method to stop fractions from being changed, so they can be shared
+
+        Parameters
+        ----------
+        name : str
+            the attribute.
+        value : object
+            the new value.
+
+        Raises
+        ------
+        AttributeError
+            always.
+
+        """
+        raise AttributeError("Frac is immutable")
+    
+    def __delattr__(self, name):
+        """
+        A method to stop the parts of a fraction from being deleted
+
+        Parameters
+        ----------
+        name : str
+            the attribute.
+
+        Raises
+        ------
+        AttributeError
+            always.
+
+        """
+        raise AttributeError("Frac is immutable")
+    
+    def __reduce__(self):
+        """
+        A method to pickle a fraction by its parts
+
+        Returns
+        -------
+        tuple
+            the class and the arguments to recreate the fraction.
+
+        """
+        return (Frac, (self.num, self.den))
+    
+    @staticmethod
+    def sum(values):
+        """
+        Method to add up many numbers exactly, see FracAccumulator
+
+        Parameters
+        ----------
+        values : iterable
+            Frac, int or numbers.Rational values.
+
+        Returns
+        -------
+        Frac
+            the total.
 
         """
-        self.num = int(num)
-        self.den = int(den)
+        accumulator = FracAccumulator()
+        accumulator.update(values)
+        return accumulator.total()
     
     def simplify(self):
         """
-        Method for simplifying a fraction
+        Method for simplifying a fraction; fractions are always kept in
+        lowest terms, so this is the fraction itself
 
         Returns
         -------
@@ -40,41 +194,7 @@ class Frac:
             the simplified fraction.
 
         """
-        # Stores the numerator and denominator to use in calculations
-        num = self.num
-        den = self.den
-        # If the numerator is zero, return a fraction object 0/1
-        if num == 0:
-            return Frac(0, 1)
-        # If the numerator is bigger than the denominator find the GCF
-        elif (num > den):
-            # Find the GCF
-            rem = num % den
-            # If the GCF is zero, deivide by the denominator
-            if rem == 0:
-                return Frac(num / den, den / den)
-            # Divide by the GCF
-            elif rem != 1 and num % rem == 0 and den % rem == 0:
-                return Frac(num / rem, den / rem)
-            # Otherwise the fraction is already simplified
-            else:
-                return Frac(num, den)
-        # If the numerator is less than the denominator find the GCF
-        elif (num < den):
-            # Find the GCF
-            rem = den % num
-            # If the GCF is zero, deivide by the numerator
-            if rem == 0:
-                return Frac(num / num, den / num)
-            # Divide by the GCF
-            elif rem != 1 and num % rem == 0 and den % rem == 0:
-                return Frac(num / rem, den / rem)
-            # Otherwise the fraction is already simplified
-            else:
-                return Frac(num, den)
-        # If the numerator and denominator are equal, return 1/1
-        else:
-            return Frac(1, 1)
+        return self
     
     def __add__ (self, other):
         """
@@ -82,7 +202,7 @@ class Frac:
 
         Parameters
         ----------
-        other : Frac
+        other : Frac, int or numbers.Rational
             The fraction to be added.
 
         Returns
@@ -91,9 +211,25 @@ class Frac:
             the sum.
 
         """
-        # Finds the common denominator, adds, and simplifies
-        return Frac(self.num * other.den + other.num * self.den, self.den * 
-               other.den).simplify()
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        num_1, den_1 = self.num, self.den
+        num_2, den_2 = other.num, other.den
+        # Work over the least common denominator so the integers stay small
+        divisor = math.gcd(den_1, den_2)
+        if divisor == 1:
+            return Frac._from_reduced(num_1 * den_2 + num_2 * den_1,
+                                      den_1 * den_2)
+        scale = den_1 // divisor
+        num = num_1 * (den_2 // divisor) + num_2 * scale
+        # Only a factor of the shared divisor can still cancel
+        divisor = math.gcd(num, divisor)
+        if divisor == 1:
+            return Frac._from_reduced(num, scale * den_2)
+        return Frac._from_reduced(num // divisor,
+                                  scale * (den_2 // divisor))
     
     def __sub__ (self, other):
         """
@@ -101,7 +237,7 @@ class Frac:
 
         Parameters
         ----------
-        other : Frac
+        other : Frac, int or numbers.Rational
             The fraction to be subtracted.
 
         Returns
@@ -110,9 +246,11 @@ class Frac:
             the difference.
 
         """
-        # Finds the common denominator, subtracts, and simplifies
-        return Frac(self.num * other.den - other.num * self.den, self.den * 
-               other.den).simplify()
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        return self + Frac._from_reduced(-other.num, other.den)
         
     def __mul__ (self, other):
         """
@@ -120,7 +258,7 @@ class Frac:
 
         Parameters
         ----------
-        other : Frac
+        other : Frac, int or numbers.Rational
             The fraction to be multiplied.
 
         Returns
@@ -129,8 +267,16 @@ class Frac:
             The product.
 
         """
-        # Finds the common denominator, multiplies, and simplifies
-        return Frac(self.num * other.num, self.den * other.den).simplify()
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        # Cancel across the two fractions before multiplying
+        divisor_1 = math.gcd(self.num, other.den)
+        divisor_2 = math.gcd(other.num, self.den)
+        return Frac._from_reduced(
+            (self.num // divisor_1) * (other.num // divisor_2),
+            (self.den // divisor_2) * (other.den // divisor_1))
         
     def __truediv__ (self, other):
         """
@@ -138,7 +284,7 @@ class Frac:
 
         Parameters
         ----------
-        other : Frac
+        other : Frac, int or numbers.Rational
             The fraction to divide.
 
         Returns
@@ -147,8 +293,116 @@ class Frac:
             The quotient.
 
         """
-        # Finds the common denominator, divides, and simplifies
-        return Frac(self.num * other.den, self.den * other.num).simplify()
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        if other.num == 0:
+            raise ZeroDivisionError(f"{self} / {other}")
+        # Cancel across the two fractions before multiplying
+        divisor_1 = math.gcd(self.num, other.num)
+        divisor_2 = math.gcd(self.den, other.den)
+        num = (self.num // divisor_1) * (other.den // divisor_2)
+        den = (self.den // divisor_2) * (other.num // divisor_1)
+        if den < 0:
+            num = -num
+            den = -den
+        return Frac._from_reduced(num, den)
+    
+    def __radd__ (self, other):
+        """
+        A method to add a fraction to a number, as in sum()
+
+        Parameters
+        ----------
+        other : int or numbers.Rational
+            The number to add to.
+
+        Returns
+        -------
+        Frac
+            the sum.
+
+        """
+        return self + other
+    
+    def __rsub__ (self, other):
+        """
+        A method to subtract a fraction from a number
+
+        Parameters
+        ----------
+        other : int or numbers.Rational
+            The number to subtract from.
+
+        Returns
+        -------
+        Frac
+            the difference.
+
+        """
+        return -self + other
+    
+    def __rmul__ (self, other):
+        """
+        A method to multiply a number by a fraction
+
+        Parameters
+        ----------
+        other : int or numbers.Rational
+            The number to be multiplied.
+
+        Returns
+        -------
+        Frac
+            The product.
+
+        """
+        return self * other
+    
+    def __rtruediv__ (self, other):
+        """
+        A method to divide a number by a fraction
+
+        Parameters
+        ----------
+        other : int or numbers.Rational
+            The number to be divided.
+
+        Returns
+        -------
+        Frac
+            The quotient.
+
+        """
+        other = _coerce(other)
+        if other is NotImplemented:
+            return other
+        return other / self
+    
+    def __neg__ (self):
+        """
+        A method to negate a fraction
+
+        Returns
+        -------
+        Frac
+            the negated fraction.
+
+        """
+        return Frac._from_reduced(-self.num, self.den)
+    
+    def __repr__(self):
+        """
+        A method to represent a fraction as its constructor call
+
+        Returns
+        -------
+        str
+            the constructor call.
+
+        """
+        return f"Frac({self.num}, {self.den})"
     
     def __str__(self):
         """
@@ -156,20 +410,107 @@ class Frac:
 
         Returns
         -------
-        TYPE
-            DESCRIPTION.
+        str
+            the numerator and denominator separated by a slash.
 
         """
         return str(self.num) + "/" + str(self.den)
     
+    def _compare(self, other):
+        """
+        Method to compare a fraction with a number exactly, by cross
+        multiplying
+
+        Parameters
+        ----------
+        other : Frac
+            the fraction to compare to.
+
+        Returns
+        -------
+        tuple
+            the two integers whose order is the order of the fractions.
+
+        """
+        # Equal denominators, as between prices of one mall, need no products
+        if self.den == other.den:
+            return self.num, other.num
+        return self.num * other.den, other.num * self.den
+    
+    def __eq__(self, other):
+        """
+        A method to define equality between fractions and numbers
+
+        Parameters
+        ----------
+        other : Frac, int, numbers.Rational or float
+            a number to compare to.
+
+        Returns
+        -------
+        Bool
+            True or false.
+
+        """
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        # Fractions are kept in lowest terms, so equal ones have equal parts
+        return self.num == other.num and self.den == other.den
+    
+    def __lt__(self, other):
+        """
+        A method to compare if a fraction is less than another
+
+        Parameters
+        ----------
+        other : Frac, int, numbers.Rational or float
+            A number to compare to.
+
+        Returns
+        -------
+        Bool
+            Whether the statement is true or false.
+
+        """
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        left, right = self._compare(other)
+        return left < right
+    
+    def __le__(self, other):
+        """
+        A method to compare if a fraction is at most another
+
+        Parameters
+        ----------
+        other : Frac, int, numbers.Rational or float
+            A number to compare to.
+
+        Returns
+        -------
+        Bool
+            Whether the statement is true or false.
+
+        """
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        left, right = self._compare(other)
+        return left <= right
+    
     def __gt__(self, other):
         """
         A method to compare if a fraction is greater than another
 
         Parameters
         ----------
-        other : Frac
-            A fraction to compare to.
+        other : Frac, int, numbers.Rational or float
+            A number to compare to.
 
         Returns
         -------
@@ -177,7 +518,255 @@ class Frac:
             Whether the statement is true or false.
 
         """
-        return self.num / self.den > other.num / other.den
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        left, right = self._compare(other)
+        return left > right
+    
+    def __ge__(self, other):
+        """
+        A method to compare if a fraction is at least another
 
-        
-        
\ No newline at end of file
+        Parameters
+        ----------
+        other : Frac, int, numbers.Rational or float
+            A number to compare to.
+
+        Returns
+        -------
+        Bool
+            Whether the statement is true or false.
+
+        """
+        if type(other) is not Frac:
+            other = _coerce(other)
+            if other is NotImplemented:
+                return other
+        left, right = self._compare(other)
+        return left >= right
+    
+    def __hash__(self):
+        """
+        A method to hash fractions the way int and fractions.Fraction are,
+        so that equal numbers share a hash
+
+        Returns
+        -------
+        int
+            the hash code for the fraction.
+
+        """
+        # The hash is num / den modulo a prime; a denominator which is a
+        # multiple of the prime has no inverse and hashes as infinity
+        try:
+            inverse = pow(self.den, -1, _HASH_MODULUS)
+        except ValueError:
+            result = _HASH_INF
+        else:
+            result = hash(hash(abs(self.num)) * inverse)
+        if self.num < 0:
+            result = -result
+        return -2 if result == -1 else result
+    
+    def __float__(self):
+        """
+        A method to convert a fraction to the nearest float
+
+        Returns
+        -------
+        float
+            the value of the fraction.
+
+        """
+        # Integer true division rounds correctly even for huge parts
+        return self.num / self.den
+
+def _add_parts(left, right):
+    """
+    Function to add two fractions given as parts over the least common
+    multiple of their denominators, without reducing the result
+
+    Parameters
+    ----------
+    left : tuple
+        the numerator and positive denominator of the first fraction.
+    right : tuple
+        the numerator and positive denominator of the second fraction.
+
+    Returns
+    -------
+    tuple
+        the numerator and denominator of the sum.
+
+    """
+    num_1, den_1 = left
+    num_2, den_2 = right
+    if den_1 == den_2:
+        return num_1 + num_2, den_1
+    divisor = math.gcd(den_1, den_2)
+    return (num_1 * (den_2 // divisor) + num_2 * (den_1 // divisor),
+            den_1 // divisor * den_2)
+
+def _tree_sum(parts):
+    """
+    Function to add a list of fractions given as parts pairwise, so each
+    addition joins sums of about the same size
+
+    Parameters
+    ----------
+    parts : list
+        numerator and positive denominator pairs, at least one.
+
+    Returns
+    -------
+    tuple
+        the numerator and denominator of the total.
+
+    """
+    while len(parts) > 1:
+        paired = [_add_parts(parts[index], parts[index + 1])
+                  for index in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            paired.append(parts[-1])
+        parts = paired
+    return parts[0]
+
+class FracAccumulator:
+    
+    """Class for adding up many fractions exactly and cheaply"""
+    
+    __slots__ = ("_terms", "_stack", "count")
+    
+    def __init__(self):
+        """
+        Initializes an empty sum; terms are first added into a numerator
+        per denominator, which only needs integer additions, and every
+        ACCUMULATOR_TERMS denominators are folded into a stack of partial
+        sums which are merged pairwise like a binary counter, so additions
+        join sums of about the same size; nothing is reduced until total
+
+        Returns
+        -------
+        None.
+
+        """
+        # The summed numerators of the terms, by denominator
+        self._terms = {}
+        # The partial sums as (level, numerator, denominator); a sum at
+        # level k covers 2 ** k foldings
+        self._stack = []
+        self.count = 0
+        return
+    
+    def add(self, value):
+        """
+        Method to add a number to the sum
+
+        Parameters
+        ----------
+        value : Frac, int or numbers.Rational
+            the number.
+
+        Returns
+        -------
+        None.
+
+        """
+        if type(value) is not Frac:
+            value = _coerce(value)
+            if value is NotImplemented:
+                raise TypeError("FracAccumulator only adds rational numbers")
+        terms = self._terms
+        den = value.den
+        terms[den] = terms.get(den, 0) + value.num
+        self.count += 1
+        if len(terms) >= ACCUMULATOR_TERMS:
+            self._fold()
+        return
+    
+    def __iadd__(self, value):
+        """
+        A method to add a number to the sum with +=
+
+        Parameters
+        ----------
+        value : Frac, int or numbers.Rational
+            the number.
+
+        Returns
+        -------
+        FracAccumulator
+            the accumulator itself.
+
+        """
+        self.add(value)
+        return self
+    
+    def update(self, values):
+        """
+        Method to add many numbers to the sum
+
+        Parameters
+        ----------
+        values : iterable
+            Frac, int or numbers.Rational values.
+
+        Returns
+        -------
+        None.
+
+        """
+        for value in values:
+            self.add(value)
+        return
+    
+    def _fold(self):
+        """
+        Method to fold the numerators by denominator into the stack of
+        partial sums
+
+        Returns
+        -------
+        None.
+
+        """
+        if not self._terms:
+            return
+        num, den = _tree_sum([(num, den) for den, num in
+                              self._terms.items()])
+        self._terms = {}
+        level = 0
+        stack = self._stack
+        # Merge equal levels like the carries of a binary counter
+        while stack and stack[-1][0] == level:
+            other_level, other_num, other_den = stack.pop()
+            num, den = _add_parts((other_num, other_den), (num, den))
+            level += 1
+        stack.append((level, num, den))
+        return
+    
+    def total(self):
+        """
+        Method to get the sum so far, in lowest terms
+
+        Returns
+        -------
+        Frac
+            the sum.
+
+        """
+        self._fold()
+        if not self._stack:
+            return _ZERO
+        num, den = _tree_sum([(num, den) for level, num, den in
+                              reversed(self._stack)])
+        result = Frac(num, den)
+        # Keep the reduced total so later terms start from small integers
+        self._stack = [(self._stack[0][0], result.num, result.den)]
+        return result
+
+# The shared fractions 0 and 1
+_ZERO = Frac(0, 1)
+_ONE = Frac(1, 1)
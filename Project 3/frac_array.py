@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Jan  7 12:23:54 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import numbers
+import operator
+
+import numpy as np
+
+import frac
+
+# Parts are kept in int64 while their magnitudes stay below this, so any
+# product of two of them that is checked against INT64_BOUND cannot wrap
+INT64_LIMIT = 1 << 62
+
+# The magnitude every intermediate result of an int64 operation must stay
+# below
+INT64_BOUND = 1 << 63
+
+def _max_abs(values):
+    """
+    Function to find the largest magnitude of an array of integers
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        int64 or Python integers.
+
+    Returns
+    -------
+    int
+        the largest magnitude, 0 for an empty array.
+
+    """
+    if values.size == 0:
+        return 0
+    return max(abs(int(values.max())), abs(int(values.min())))
+
+def _fits(*products):
+    """
+    Function to check whether a sum of products of parts fits in int64
+
+    Parameters
+    ----------
+    *products : tuple
+        pairs of arrays, whose largest magnitudes are multiplied.
+
+    Returns
+    -------
+    bool
+        whether the sum of the products of the magnitudes is in range.
+
+    """
+    total = 0
+    for left, right in products:
+        total += _max_abs(left) * _max_abs(right)
+    return total < INT64_BOUND
+
+def _as_objects(values):
+    """
+    Function to move an array of integers to Python integers, which cannot
+    overflow
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        int64 or Python integers.
+
+    Returns
+    -------
+    numpy.ndarray
+        an object array of Python integers.
+
+    """
+    if values.dtype == object:
+        return values
+    return values.astype(object)
+
+class FracArray:
+
+    """Class for storing and operating on many fractions at once"""
+
+    __slots__ = ("num", "den")
+
+    def __init__(self, num, den = None):
+        """
+        Initializes the fractions from their numerators and denominators,
+        reducing them to lowest terms with positive denominators; the parts
+        are int64 unless they are too large, then Python integers
+
+        Parameters
+        ----------
+        num : array_like
+            the numerators.
+        den : array_like, optional
+            the denominators. The default is all ones.
+
+        Returns
+        -------
+        None.
+
+        Examples
+        --------
+        Integers near 2**63 are kept exactly, whatever NumPy would make of
+        them:
+
+        >>> FracArray([2**63 + 1, -1])
+        FracArray([9223372036854775809/1, -1/1])
+        >>> FracArray(np.array([2**63 + 1], dtype=np.uint64)).backend
+        'object'
+        >>> FracArray([2**62 - 1, -1]).backend
+        'int64'
+
+        """
+        num = self._integers(num)
+        den = (np.ones_like(num, dtype=np.int64) if den is None
+               else self._integers(den))
+        num, den = np.broadcast_arrays(num, den)
+        if (den == 0).any():
+            raise ZeroDivisionError("FracArray with a zero denominator")
+        self.num, self.den = self._reduce(num, den)
+
+    @staticmethod
+    def _integers(values):
+        """
+        Method to turn parts into a 1D array of int64 or Python integers;
+        they stay Python integers if any magnitude reaches INT64_LIMIT
+
+        Parameters
+        ----------
+        values : array_like
+            the integers.
+
+        Returns
+        -------
+        numpy.ndarray
+            the integers.
+
+        """
+        # Lists are not left to NumPy, which would turn integers near 2**63
+        # into uint64 or float64, and unsigned arrays could wrap in int64
+        if not isinstance(values, (list, tuple)):
+            values = np.asarray(values)
+            if values.dtype.kind not in "biuO":
+                raise TypeError("FracArray parts must be integers")
+        if isinstance(values, np.ndarray) and values.dtype.kind == "i":
+            values = values.reshape(-1)
+        else:
+            values = np.asarray(values, dtype=object).reshape(-1)
+            values = np.fromiter(map(operator.index, values), dtype=object,
+                                 count=values.size)
+        if values.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        if _max_abs(values) >= INT64_LIMIT:
+            return _as_objects(values)
+        return values.astype(np.int64)
+
+    @staticmethod
+    def _reduce(num, den):
+        """
+        Method to divide parts by their GCD, move the signs to the
+        numerators and return to int64 once the parts are small enough
+
+        Parameters
+        ----------
+        num : numpy.ndarray
+            the numerators.
+        den : numpy.ndarray
+            the denominators, none zero.
+
+        Returns
+        -------
+        num : numpy.ndarray
+            the reduced numerators.
+        den : numpy.ndarray
+            the positive reduced denominators.
+
+        """
+        if num.dtype == object or den.dtype == object:
+            num = _as_objects(num)
+            den = _as_objects(den)
+        divisor = np.gcd(num, den)
+        # The GCD is positive, so the sign of the denominator is moved over
+        divisor = np.where(den < 0, -divisor, divisor)
+        num = num // divisor
+        den = den // divisor
+        if num.dtype == object and max(_max_abs(num),
+                                       _max_abs(den)) < INT64_LIMIT:
+            num = num.astype(np.int64)
+            den = den.astype(np.int64)
+        return num, den
+
+    @classmethod
+    def _from_reduced(cls, num, den):
+        """
+        Method to make fractions from parts already in lowest terms
+
+        Parameters
+        ----------
+        num : numpy.ndarray
+            the numerators.
+        den : numpy.ndarray
+            the positive denominators.
+
+        Returns
+        -------
+        FracArray
+            the fractions.
+
+        """
+        self = object.__new__(cls)
+        self.num = num
+        self.den = den
+        return self
+
+    @classmethod
+    def from_fracs(cls, fracs):
+        """
+        Method to gather a list of fractions into an array
+
+        Parameters
+        ----------
+        fracs : iterable
+            Frac, int or numbers.Rational values.
+
+        Returns
+        -------
+        FracArray
+            the fractions.
+
+        """
+        fracs = [value if isinstance(value, frac.Frac) else
+                 frac.Frac(value.numerator, value.denominator)
+                 for value in fracs]
+        num = [value.num for value in fracs]
+        den = [value.den for value in fracs]
+        return cls(num, den)
+
+    def to_fracs(self):
+        """
+        Method to turn the array into a list of fractions
+
+        Returns
+        -------
+        list
+            a Frac per element.
+
+        """
+        return [frac.Frac._from_reduced(num, den) for num, den in
+                zip(self.num.tolist(), self.den.tolist())]
+
+    def to_floats(self):
+        """
+        Method to find the nearest float to every fraction
+
+        Returns
+        -------
+        numpy.ndarray
+            the float64 values.
+
+        """
+        if self.num.dtype == object:
+            return np.array([num / den for num, den in zip(self.num,
+                                                           self.den)],
+                            dtype=np.float64)
+        return self.num / self.den
+
+    @property
+    def backend(self):
+        """
+        Method to tell how the parts are stored
+
+        Returns
+        -------
+        str
+            "int64", or "object" for Python integers.
+
+        """
+        return "object" if self.num.dtype == object else "int64"
+
+    def _coerce(self, other):
+        """
+        Method to turn an operand into numerator and denominator arrays
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the operand; a single number applies to every element.
+
+        Returns
+        -------
+        tuple
+            the numerators and denominators, or NotImplemented.
+
+        """
+        if isinstance(other, FracArray):
+            if len(other) != len(self):
+                raise ValueError("FracArrays must be the same length")
+            return other.num, other.den
+        if isinstance(other, frac.Frac):
+            other = (other.num, other.den)
+        elif isinstance(other, numbers.Rational):
+            other = (int(other.numerator), int(other.denominator))
+        else:
+            return NotImplemented
+        parts = []
+        for part in other:
+            # A scalar which does not fit in int64 needs the object backend
+            if abs(part) < INT64_LIMIT:
+                parts.append(np.full(len(self), part, dtype=np.int64))
+            else:
+                parts.append(np.full(len(self), part, dtype=object))
+        return tuple(parts)
+
+    def __len__(self):
+        """
+        Method to get the number of fractions
+
+        Returns
+        -------
+        int
+            the length of the array.
+
+        """
+        return self.num.size
+
+    def __getitem__(self, index):
+        """
+        Method to get a fraction or a selection of them
+
+        Parameters
+        ----------
+        index : int, slice or array_like
+            a position, slice, index array or boolean mask.
+
+        Returns
+        -------
+        Frac or FracArray
+            the fraction for a position, otherwise the selected fractions.
+
+        """
+        if isinstance(index, numbers.Integral):
+            return frac.Frac._from_reduced(int(self.num[index]),
+                                           int(self.den[index]))
+        return FracArray._from_reduced(self.num[index], self.den[index])
+
+    def __iter__(self):
+        """
+        Method to go through the fractions
+
+        Returns
+        -------
+        iterator
+            of Frac.
+
+        """
+        return iter(self.to_fracs())
+
+    def __add__ (self, other):
+        """
+        A method to add fractions elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to be added.
+
+        Returns
+        -------
+        FracArray
+            the sums.
+
+        """
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        return FracArray._from_reduced(*self._add(self.num, self.den,
+                                                  *other))
+
+    __radd__ = __add__
+
+    @staticmethod
+    def _add(num_1, den_1, num_2, den_2):
+        """
+        Method to add parts over their least common denominators
+
+        Parameters
+        ----------
+        num_1 : numpy.ndarray
+            the numerators of the first fractions.
+        den_1 : numpy.ndarray
+            the denominators of the first fractions.
+        num_2 : numpy.ndarray
+            the numerators of the second fractions.
+        den_2 : numpy.ndarray
+            the denominators of the second fractions.
+
+        Returns
+        -------
+        num : numpy.ndarray
+            the numerators of the sums.
+        den : numpy.ndarray
+            the denominators of the sums.
+
+        """
+        divisor = np.gcd(den_1, den_2)
+        scale_1 = den_1 // divisor
+        scale_2 = den_2 // divisor
+        if not _fits((num_1, scale_2), (num_2, scale_1)) or not _fits(
+                (scale_1, den_2)):
+            num_1, scale_1, num_2, scale_2, den_2 = map(
+                _as_objects, (num_1, scale_1, num_2, scale_2, den_2))
+        return FracArray._reduce(num_1 * scale_2 + num_2 * scale_1,
+                                 scale_1 * den_2)
+
+    def __sub__ (self, other):
+        """
+        A method to subtract fractions elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to be subtracted.
+
+        Returns
+        -------
+        FracArray
+            the differences.
+
+        """
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        return FracArray._from_reduced(*self._add(self.num, self.den,
+                                                  -other[0], other[1]))
+
+    def __rsub__ (self, other):
+        """
+        A method to subtract fractions from a number elementwise
+
+        Parameters
+        ----------
+        other : Frac, int or numbers.Rational
+            the number to subtract from.
+
+        Returns
+        -------
+        FracArray
+            the differences.
+
+        """
+        return -self + other
+
+    def __neg__ (self):
+        """
+        A method to negate the fractions
+
+        Returns
+        -------
+        FracArray
+            the negated fractions.
+
+        """
+        return FracArray._from_reduced(-self.num, self.den.copy())
+
+    def __mul__ (self, other):
+        """
+        A method to multiply fractions elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to be multiplied.
+
+        Returns
+        -------
+        FracArray
+            the products.
+
+        """
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        return FracArray._from_reduced(*self._multiply(self.num, self.den,
+                                                       *other))
+
+    __rmul__ = __mul__
+
+    @staticmethod
+    def _multiply(num_1, den_1, num_2, den_2):
+        """
+        Method to multiply parts, cancelling across them first
+
+        Parameters
+        ----------
+        num_1 : numpy.ndarray
+            the numerators of the first fractions.
+        den_1 : numpy.ndarray
+            the denominators of the first fractions.
+        num_2 : numpy.ndarray
+            the numerators of the second fractions.
+        den_2 : numpy.ndarray
+            the denominators of the second fractions.
+
+        Returns
+        -------
+        num : numpy.ndarray
+            the numerators of the products.
+        den : numpy.ndarray
+            the denominators of the products.
+
+        """
+        divisor_1 = np.gcd(num_1, den_2)
+        divisor_2 = np.gcd(num_2, den_1)
+        num_1 = num_1 // divisor_1
+        den_2 = den_2 // divisor_1
+        num_2 = num_2 // divisor_2
+        den_1 = den_1 // divisor_2
+        # Cancelled parts are coprime, so the products are in lowest terms
+        if not _fits((num_1, num_2)) or not _fits((den_1, den_2)):
+            num_1, den_1, num_2, den_2 = map(_as_objects,
+                                             (num_1, den_1, num_2, den_2))
+        num = num_1 * num_2
+        den = den_1 * den_2
+        negative = den < 0
+        if negative.any():
+            num = np.where(negative, -num, num)
+            den = np.where(negative, -den, den)
+        if num.dtype == object and max(_max_abs(num),
+                                       _max_abs(den)) < INT64_LIMIT:
+            num = num.astype(np.int64)
+            den = den.astype(np.int64)
+        return num, den
+
+    def __truediv__ (self, other):
+        """
+        A method to divide fractions elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to divide by.
+
+        Returns
+        -------
+        FracArray
+            the quotients.
+
+        """
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        if (other[0] == 0).any():
+            raise ZeroDivisionError("FracArray division by zero")
+        return FracArray._from_reduced(*self._multiply(
+            self.num, self.den, other[1], other[0]))
+
+    def __rtruediv__ (self, other):
+        """
+        A method to divide a number by the fractions elementwise
+
+        Parameters
+        ----------
+        other : Frac, int or numbers.Rational
+            the number to be divided.
+
+        Returns
+        -------
+        FracArray
+            the quotients.
+
+        """
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        if (self.num == 0).any():
+            raise ZeroDivisionError("FracArray division by zero")
+        return FracArray._from_reduced(*self._multiply(
+            other[0], other[1], self.den, self.num))
+
+    def _cross(self, other):
+        """
+        Method to cross multiply with an operand for comparisons
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to compare to.
+
+        Returns
+        -------
+        tuple
+            the two arrays whose elementwise order is that of the fractions,
+            or NotImplemented.
+
+        """
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        num_1, den_1 = self.num, self.den
+        num_2, den_2 = other
+        if not _fits((num_1, den_2)) or not _fits((num_2, den_1)):
+            num_1, den_1, num_2, den_2 = map(_as_objects,
+                                             (num_1, den_1, num_2, den_2))
+        return num_1 * den_2, num_2 * den_1
+
+    def __eq__(self, other):
+        """
+        A method to compare fractions for equality elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to compare to.
+
+        Returns
+        -------
+        numpy.ndarray
+            a bool per element.
+
+        """
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        # Both sides are in lowest terms, so equal fractions have equal parts
+        return np.asarray((self.num == other[0]) & (self.den == other[1]),
+                          dtype=bool)
+
+    def __ne__(self, other):
+        """
+        A method to compare fractions for inequality elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to compare to.
+
+        Returns
+        -------
+        numpy.ndarray
+            a bool per element.
+
+        """
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return ~equal
+
+    def __lt__(self, other):
+        """
+        A method to compare if fractions are less than others elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to compare to.
+
+        Returns
+        -------
+        numpy.ndarray
+            a bool per element.
+
+        """
+        cross = self._cross(other)
+        if cross is NotImplemented:
+            return cross
+        return np.asarray(cross[0] < cross[1], dtype=bool)
+
+    def __le__(self, other):
+        """
+        A method to compare if fractions are at most others elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to compare to.
+
+        Returns
+        -------
+        numpy.ndarray
+            a bool per element.
+
+        """
+        cross = self._cross(other)
+        if cross is NotImplemented:
+            return cross
+        return np.asarray(cross[0] <= cross[1], dtype=bool)
+
+    def __gt__(self, other):
+        """
+        A method to compare if fractions are greater than others elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to compare to.
+
+        Returns
+        -------
+        numpy.ndarray
+            a bool per element.
+
+        """
+        cross = self._cross(other)
+        if cross is NotImplemented:
+            return cross
+        return np.asarray(cross[0] > cross[1], dtype=bool)
+
+    def __ge__(self, other):
+        """
+        A method to compare if fractions are at least others elementwise
+
+        Parameters
+        ----------
+        other : FracArray, Frac, int or numbers.Rational
+            the fractions to compare to.
+
+        Returns
+        -------
+        numpy.ndarray
+            a bool per element.
+
+        """
+        cross = self._cross(other)
+        if cross is NotImplemented:
+            return cross
+        return np.asarray(cross[0] >= cross[1], dtype=bool)
+
+    # Elementwise equality makes the arrays unhashable, like numpy arrays
+    __hash__ = None
+
+    def sum(self):
+        """
+        Method to add up all the fractions exactly, halving the array with
+        one vectorized addition per step so the parts grow as slowly as
+        they can
+
+        Returns
+        -------
+        Frac
+            the total.
+
+        """
+        num, den = self.num, self.den
+        if num.size == 0:
+            return frac.Frac(0, 1)
+        while num.size > 1:
+            half = num.size // 2
+            carry = (num[2 * half:], den[2 * half:])
+            num, den = self._add(num[:half], den[:half],
+                                 num[half : 2 * half], den[half : 2 * half])
+            if carry[0].size:
+                num = np.concatenate((num, carry[0]))
+                den = np.concatenate((den, carry[1]))
+        return frac.Frac._from_reduced(int(num[0]), int(den[0]))
+
+    def __repr__(self):
+        """
+        A method to represent the array as a string
+
+        Returns
+        -------
+        str
+            the fractions for a short array, or its length.
+
+        """
+        if len(self) <= 8:
+            return "FracArray([" + ", ".join(map(str, self.to_fracs())) + "])"
+        return f"<FracArray of {len(self)} fractions, {self.backend}>"
@@ -8,6 +8,7 @@ Created on Sun Jan  7 12:23:28 2024
 """
 
 import frac
+import functools
 import random
 
 class Node:
@@ -98,9 +99,127 @@ class Buyer:
         self.remaining_budget = remaining_budget
         return
         
-def run_simulation(connectivities_file, pricing_file, budgets_file):
+# The number of budget units per currency unit in fixed-point simulations
+FIXED_SCALE = 10 ** 9
+
+# The number of buyers also simulated exactly to measure the deviation of
+# the float and fixed-point simulations
+DEVIATION_SAMPLE = 100
+
+# The number of characters of the budgets file read at a time
+BLOCK_SIZE = 1 << 20
+
+def _walk_exact(nodes, node_id, budget):
     """
-    A method to run a simulation of buyers traversing the nodes
+    A generator of the purchases of a buyer, in exact fractions
+
+    Parameters
+    ----------
+    nodes : dictionary
+        the nodes by ID.
+    node_id : str
+        the ID of the starting node.
+    budget : Frac
+        the budget of the buyer.
+
+    Yields
+    ------
+    node_id : str
+        the ID of the node of the purchase.
+    spent : Frac
+        the amount spent.
+
+    """
+    # While the buyer can make a purchase in their current node
+    while budget > nodes[node_id].minimum_price:
+        node = nodes[node_id]
+        # The buyer spends the fractional price of their remaining budget
+        spent = budget * node.fractional_price
+        budget -= spent
+        yield node_id, spent
+        # If the buyer has a node to go to, update their current node
+        if node.connected_nodes:
+            node_id = random.choice(node.connected_nodes)
+        # Otherwise stop because they have nowhere else to go
+        else:
+            break
+
+def _walk_float(prices, node_id, budget):
+    """
+    A generator of the purchases of a buyer, in float64
+
+    Parameters
+    ----------
+    prices : dictionary
+        the minimum price, fractional price and connected node IDs of each
+        node, by ID, with the prices as floats.
+    node_id : str
+        the ID of the starting node.
+    budget : Frac
+        the budget of the buyer.
+
+    Yields
+    ------
+    node_id : str
+        the ID of the node of the purchase.
+    spent : float
+        the amount spent.
+
+    """
+    budget = float(budget)
+    minimum_price, fractional_price, connected_nodes = prices[node_id]
+    while budget > minimum_price:
+        spent = budget * fractional_price
+        budget -= spent
+        yield node_id, spent
+        if not connected_nodes:
+            break
+        node_id = random.choice(connected_nodes)
+        minimum_price, fractional_price, connected_nodes = prices[node_id]
+
+def _walk_fixed(prices, node_id, budget, scale):
+    """
+    A generator of the purchases of a buyer, in integer units of 1 / scale
+    rounded down
+
+    Parameters
+    ----------
+    prices : dictionary
+        the minimum price numerator and denominator, fractional price
+        numerator and denominator and connected node IDs of each node, by
+        ID.
+    node_id : str
+        the ID of the starting node.
+    budget : Frac
+        the budget of the buyer.
+    scale : int
+        the number of units per currency unit.
+
+    Yields
+    ------
+    node_id : str
+        the ID of the node of the purchase.
+    spent : int
+        the units spent.
+
+    """
+    budget = budget.num * scale // budget.den
+    (minimum_num, minimum_den, fraction_num, fraction_den,
+     connected_nodes) = prices[node_id]
+    # budget / scale > num / den, without leaving the integers
+    while budget * minimum_den > minimum_num * scale:
+        spent = budget * fraction_num // fraction_den
+        budget -= spent
+        yield node_id, spent
+        if not connected_nodes:
+            break
+        node_id = random.choice(connected_nodes)
+        (minimum_num, minimum_den, fraction_num, fraction_den,
+         connected_nodes) = prices[node_id]
+
+def load_nodes(connectivities_file, pricing_file):
+    """
+    A method to read the nodes of a mall and their connections
 
     Parameters
     ----------
@@ -108,18 +227,13 @@ def run_simulation(connectivities_file, pricing_file, budgets_file):
         the file name which stores connections between nodes.
     pricing_file : str
         the file name which stores the prices at different nodes.
-    budgets_file : str
-        the file name which stores the budgets of the buyers.
 
     Returns
     -------
-    total_revenue : Frac
-        the total revenue earned among the malls.
-    node_revenues : dictionary
-        a dictionary of node IDs and their fraction of the revenue earned.
+    nodes : dictionary
+        the nodes by ID, in the order of the pricing file.
 
     """
-    
     # Create a dictionary to store the nodes with their IDs as keys
     nodes = {}
     # Open the pricing file
@@ -147,55 +261,243 @@ def run_simulation(connectivities_file, pricing_file, budgets_file):
         nodes[split_line[0]].connected_nodes.append(split_line[1])     
     # Close the file
     my_sample_file.close()
+    return nodes
+
+def run_simulation(connectivities_file, pricing_file, budgets_file,
+                   numeric = "exact", scale = FIXED_SCALE,
+                   sample_size = DEVIATION_SAMPLE, return_deviation = False):
+    """
+    A method to run a simulation of buyers traversing the nodes
+
+    Parameters
+    ----------
+    connectivities_file : str
+        the file name which stores connections between nodes.
+    pricing_file : str
+        the file name which stores the prices at different nodes.
+    budgets_file : str
+        the file name which stores the budgets of the buyers.
+    numeric : str, optional
+        "exact" for fractions, "float" for float64 or "fixed" for integer
+        units of 1 / scale, rounded down at every purchase. The default is
+        "exact".
+    scale : int, optional
+        the number of units per currency unit of "fixed". The default is
+        FIXED_SCALE.
+    sample_size : int, optional
+        the number of buyers, spread over the file, also simulated exactly
+        with the same random numbers by "float" and "fixed" when
+        return_deviation is set. The default is DEVIATION_SAMPLE.
+    return_deviation : bool, optional
+        whether to also return max_deviation. The default is False.
+
+    Returns
+    -------
+    total_revenue : Frac or float
+        the total revenue earned among the malls.
+    node_revenues : dictionary
+        a dictionary of node IDs and their fraction of the revenue earned.
+    max_deviation : float
+        the largest difference between a sampled buyer's total spending
+        and its exact value, always 0.0 for "exact"; only returned when
+        return_deviation is set.
+
+    """
+    if numeric not in ("exact", "float", "fixed"):
+        raise ValueError(f"Unknown numeric mode {numeric!r}")
     
-    # Create a list to store the buyers
-    buyers = []
-    # Open the budgets file
-    my_sample_file = open(budgets_file, 'r', encoding='utf-8-sig')
-    # Iterate over the lines in the file
-    for line in my_sample_file:
-        # Split the line into entries
-        split_line = line.rsplit()
-        # Iterate through the entrys
-        for budget in split_line:
-            # Create a buyer with its budget that entry and store it
-            # in the list of buyers; the buyer has a random starting node
-            buyers.append(Buyer(random.choice(list(nodes.keys())), 
-                          frac.Frac(budget, 1)))
-    # Close the file
-    my_sample_file.close()
+    # Read the nodes and their connections
+    nodes = load_nodes(connectivities_file, pricing_file)
     
-    # Initialize the total revenue earned among the nodes
-    total_revenue = frac.Frac(0, 1)
+    # Stream the buyers from the budgets file into the simulation
+    buyers = read_buyers(budgets_file, list(nodes))
+    if numeric == "exact":
+        total_revenue, node_revenues = _simulate_exact(nodes, buyers)
+        max_deviation = 0.0
+    else:
+        # Only replay a sample exactly if the deviation is wanted
+        total_revenue, node_revenues, max_deviation = _simulate_approximate(
+            nodes, buyers, numeric, scale,
+            sample_size if return_deviation else 0)
+    if return_deviation:
+        return total_revenue, node_revenues, max_deviation
+    return total_revenue, node_revenues
+
+def read_buyers(budgets_file, node_ids, block_size = BLOCK_SIZE):
+    """
+    A generator of the buyers of a budgets file, read a block of the file at
+    a time so that memory stays bounded however the budgets are laid out
+
+    Parameters
+    ----------
+    budgets_file : str
+        the file name which stores the budgets of the buyers.
+    node_ids : list
+        the IDs of the nodes, from which each buyer's start is drawn.
+    block_size : int, optional
+        the number of characters read at a time. The default is BLOCK_SIZE.
+
+    Yields
+    ------
+    Buyer
+        the next buyer, at a random starting node.
+
+    """
+    # The start of a budget cut off at the end of the previous block
+    carry = ""
+    # Open the budgets file
+    with open(budgets_file, 'r', encoding='utf-8-sig') as my_sample_file:
+        # Iterate over the blocks of the file
+        for block in iter(lambda: my_sample_file.read(block_size), ""):
+            entries = (carry + block).split()
+            carry = ""
+            if entries and not block[-1].isspace():
+                carry = entries.pop()
+            # Iterate through the entries; each buyer has its budget and a
+            # random starting node
+            for budget in entries:
+                yield Buyer(random.choice(node_ids), frac.Frac(budget, 1))
+    if carry:
+        yield Buyer(random.choice(node_ids), frac.Frac(carry, 1))
+
+def _simulate_exact(nodes, buyers):
+    """
+    A method to simulate the buyers in exact fractions
+
+    Parameters
+    ----------
+    nodes : dictionary
+        the nodes by ID.
+    buyers : iterable
+        the buyers.
+
+    Returns
+    -------
+    total_revenue : Frac
+        the total revenue earned among the malls.
+    node_revenues : dictionary
+        a dictionary of node IDs and their fraction of the revenue earned.
+
+    """
+    # Initialize the total revenue earned among the nodes; the revenues are
+    # accumulated and only added up once every buyer is done
+    total_revenue = frac.FracAccumulator()
+    node_accumulators = {}
+    for node in nodes.values():
+        node_accumulators[node.ID] = frac.FracAccumulator()
+        node_accumulators[node.ID].add(node.revenue)
     # Iterate through the buyers to simulate their purchasing
     for buyer in buyers:
-        # While the buyer can make a purchase in their current node
-        while (buyer.remaining_budget >
-               nodes[buyer.current_node_id].minimum_price):
-            # The buyer spends the fractional price of their remaining budget
-            spent = (buyer.remaining_budget * nodes[buyer.current_node_id].
-                     fractional_price)
-            # Update the buyer's remaining budget
-            buyer.remaining_budget -= spent
-            # Update the revenue of that node
-            nodes[buyer.current_node_id].revenue += spent
-            # Update the total revenue
-            total_revenue += spent
-            # If the buyer has a node to go to, update their current node
-            if nodes[buyer.current_node_id].connected_nodes:
-                buyer.current_node_id = random.choice(
-                nodes[buyer.current_node_id].connected_nodes)
-            # Otherwise break because they have nowhere else to go
-            else:
-                break
+        for node_id, spent in _walk_exact(nodes, buyer.current_node_id,
+                                          buyer.remaining_budget):
+            # Update the revenue of that node and the total revenue
+            node_accumulators[node_id].add(spent)
+            total_revenue.add(spent)
+    
+    # Add up the revenues
+    total_revenue = total_revenue.total()
+    for node in nodes.values():
+        node.revenue = node_accumulators[node.ID].total()
     
     # Initialize a dictionary for the nodes IDs and the fraction of the total
     # revenue which they earned
     node_revenues = {}
     # Iterate through the nodes
     for node in nodes.values():
-        # Calculate the proportion of the revenue that node earned 
-        node_revenues[node.ID] = node.revenue / total_revenue
+        # Calculate the proportion of the revenue that node earned; with no
+        # revenue at all, every node earned none of it
+        if total_revenue == 0:
+            node_revenues[node.ID] = frac.Frac(0, 1)
+        else:
+            node_revenues[node.ID] = node.revenue / total_revenue
     # Return the total revenue and the dictionary of nodes and revenues
     return total_revenue, node_revenues
-    
\ No newline at end of file
+
+def _simulate_approximate(nodes, buyers, numeric, scale, sample_size):
+    """
+    A method to simulate the buyers in float64 or fixed-point arithmetic,
+    measuring the deviation from the exact simulation on a sample of them
+
+    Parameters
+    ----------
+    nodes : dictionary
+        the nodes by ID.
+    buyers : iterable
+        the buyers.
+    numeric : str
+        "float" or "fixed".
+    scale : int
+        the number of units per currency unit of "fixed".
+    sample_size : int
+        the largest number of buyers kept in the sample of those also
+        simulated exactly.
+
+    Returns
+    -------
+    total_revenue : float or Frac
+        the total revenue earned among the malls, a float for "float" and
+        a whole number of units for "fixed".
+    node_revenues : dictionary
+        a dictionary of node IDs and their fraction of the revenue earned.
+    max_deviation : float
+        the largest difference between a sampled buyer's total spending
+        and its exact value.
+
+    """
+    if numeric == "float":
+        prices = {node.ID: (float(node.minimum_price),
+                            float(node.fractional_price),
+                            node.connected_nodes)
+                  for node in nodes.values()}
+        walk = functools.partial(_walk_float, prices)
+        revenues = dict.fromkeys(nodes, 0.0)
+    else:
+        prices = {node.ID: (node.minimum_price.num, node.minimum_price.den,
+                            node.fractional_price.num,
+                            node.fractional_price.den, node.connected_nodes)
+                  for node in nodes.values()}
+        walk = functools.partial(_walk_fixed, prices, scale=scale)
+        revenues = dict.fromkeys(nodes, 0)
+    # The deviations of the sampled buyers, by their number; every stride-th
+    # buyer is sampled
+    deviations = {}
+    stride = 1
+    for number, buyer in enumerate(buyers):
+        sampled = sample_size > 0 and number % stride == 0
+        if sampled:
+            state = random.getstate()
+        spending = 0
+        for node_id, spent in walk(buyer.current_node_id,
+                                   buyer.remaining_budget):
+            revenues[node_id] += spent
+            spending += spent
+        if sampled:
+            # Replay the buyer exactly from the same random numbers, then
+            # carry on from where the approximate walk left them
+            after = random.getstate()
+            random.setstate(state)
+            exact = frac.Frac.sum(spent for node_id, spent in _walk_exact(
+                nodes, buyer.current_node_id, buyer.remaining_budget))
+            random.setstate(after)
+            if numeric == "fixed":
+                spending = frac.Frac(spending, scale)
+            # Floats convert to fractions exactly, so the difference is exact
+            deviations[number] = abs(float(exact - spending))
+            # Once the sample is full, keep every other buyer of it, so it
+            # spans all the buyers so far without knowing how many will come
+            if len(deviations) > sample_size:
+                stride *= 2
+                deviations = {sampled_number: deviation for
+                              sampled_number, deviation in deviations.items()
+                              if sampled_number % stride == 0}
+    max_deviation = max(deviations.values(), default=0.0)
+    total_revenue = sum(revenues.values())
+    # With no revenue at all, every node earned none of it
+    if numeric == "fixed":
+        node_revenues = {node_id: frac.Frac(revenue, total_revenue or 1)
+                         for node_id, revenue in revenues.items()}
+        total_revenue = frac.Frac(total_revenue, scale)
+    else:
+        node_revenues = {node_id: revenue / total_revenue if total_revenue
+                         else 0.0 for node_id, revenue in revenues.items()}
+    return total_revenue, node_revenues, max_deviation
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Jan  7 12:23:28 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+# The directory of compiled graphs, in the user's cache directory
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or
+                         os.path.join(os.path.expanduser("~"), ".cache"),
+                         "mall_graphs")
+
+# The file in the cache directory remembering the hash of each input file
+INDEX_FILE = "index.json"
+
+# The number of bytes hashed at a time
+CHUNK_SIZE = 1 << 20
+
+# The number of bytes of a file split into entries at a time
+BLOCK_SIZE = 1 << 24
+
+# The byte order mark which may start a UTF-8 file
+BOM = b"\xef\xbb\xbf"
+
+# Whether each byte is whitespace, as for str.split
+WHITESPACE = np.zeros(256, dtype=bool)
+WHITESPACE[list(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")] = True
+
+# The arrays of a compiled graph, each saved as its own .npy file
+ARRAYS = ("ids", "minimum_prices", "fractional_prices", "offsets",
+          "targets")
+
+class MallGraph:
+
+    """Class for storing a mall as integer-indexed arrays"""
+
+    def __init__(self, ids, minimum_prices, fractional_prices, offsets,
+                 targets):
+        """
+        Initializes the graph
+
+        Parameters
+        ----------
+        ids : array_like
+            the ID of each node, by index.
+        minimum_prices : numpy.ndarray
+            the float64 minimum price of each node.
+        fractional_prices : numpy.ndarray
+            the float64 fractional price of each node.
+        offsets : numpy.ndarray
+            the int64 start of each node's connections in targets, with the
+            end of the last one appended.
+        targets : numpy.ndarray
+            the int64 indices of the connected nodes, grouped by node in
+            file order.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.ids = ids
+        self.minimum_prices = minimum_prices
+        self.fractional_prices = fractional_prices
+        self.offsets = offsets
+        self.targets = targets
+        return
+
+    def __len__(self):
+        """
+        Method to get the number of nodes
+
+        Returns
+        -------
+        int
+            the number of nodes.
+
+        """
+        return len(self.ids)
+
+def _read_tokens(file_name, block_size = BLOCK_SIZE):
+    """
+    A generator of the whitespace-separated entries of a file, a block of
+    the file at a time, split in bulk without a Python object per entry
+
+    Parameters
+    ----------
+    file_name : str
+        the file name.
+    block_size : int, optional
+        the number of bytes read at a time. The default is BLOCK_SIZE.
+
+    Yields
+    ------
+    numpy.ndarray
+        the entries of the next block, as fixed-width byte strings.
+
+    """
+    # The start of an entry cut off at the end of the previous block
+    carry = b""
+    with open(file_name, 'rb') as my_sample_file:
+        block = my_sample_file.read(max(block_size, len(BOM)))
+        if block.startswith(BOM):
+            block = block[len(BOM):] or my_sample_file.read(block_size)
+        while block:
+            data = np.frombuffer(carry + block, dtype=np.uint8)
+            block = my_sample_file.read(block_size)
+            spaces = WHITESPACE[data]
+            if block:
+                # Hold back the last entry, which may go on in the next block
+                breaks = np.flatnonzero(spaces)
+                end = breaks[-1] + 1 if breaks.size else 0
+                carry = data[end:].tobytes()
+                data = data[:end]
+                spaces = spaces[:end]
+            # Entries start where a space ends and end where one starts
+            edges = np.diff(np.concatenate(([1], spaces, [1])).astype(np.int8))
+            starts = np.flatnonzero(edges == -1)
+            lengths = np.flatnonzero(edges == 1) - starts
+            if not starts.size:
+                continue
+            width = int(lengths.max())
+            # Copy the entries a column of characters at a time, padding the
+            # short ones with nulls, which byte strings ignore
+            entries = np.zeros((starts.size, width), dtype=np.uint8)
+            for column in range(width):
+                characters = data[np.minimum(starts + column, data.size - 1)]
+                characters[lengths <= column] = 0
+                entries[:, column] = characters
+            yield entries.view(f"S{width}").ravel()
+
+def _id_keys(ids):
+    """
+    A method to turn node IDs into keys which sort and compare quickly;
+    IDs of up to eight bytes are packed into an integer each
+
+    Parameters
+    ----------
+    ids : numpy.ndarray
+        the IDs, as byte strings.
+
+    Returns
+    -------
+    numpy.ndarray
+        the uint64 key of each ID, or the IDs themselves if any is longer.
+
+    """
+    if ids.dtype.itemsize > 8:
+        return ids
+    return ids.astype("S8").view(np.uint64)
+
+def _node_indices(sorted_keys, order, ids, file_name):
+    """
+    A method to find the dense index of each of an array of node IDs
+
+    Parameters
+    ----------
+    sorted_keys : numpy.ndarray
+        the key of every node ID, sorted.
+    order : numpy.ndarray
+        the index of the node of each of the sorted keys.
+    ids : numpy.ndarray
+        the IDs to look up, as byte strings.
+    file_name : str
+        the file the IDs come from, for errors.
+
+    Returns
+    -------
+    numpy.ndarray
+        the int64 index of each ID.
+
+    """
+    if sorted_keys.dtype == np.uint64:
+        # Every node ID fits in eight bytes, so a longer entry is unknown
+        longer = ids != ids.astype("S8")
+        keys = _id_keys(ids.astype("S8"))
+        # Looking the keys up in sorted order keeps the search in cache
+        sorting = np.argsort(keys)
+        positions = np.empty(keys.size, dtype=np.int64)
+        positions[sorting] = np.searchsorted(sorted_keys, keys[sorting])
+    else:
+        longer = False
+        keys = ids
+        positions = np.searchsorted(sorted_keys, keys)
+    np.minimum(positions, sorted_keys.size - 1, out=positions)
+    unknown = np.flatnonzero(longer | (sorted_keys[positions] != keys))
+    if unknown.size:
+        node_id = ids[unknown[0]].decode('utf-8')
+        raise ValueError(f"Unknown node ID {node_id!r} in {file_name}")
+    return order[positions]
+
+def compile_graph(connectivities_file, pricing_file):
+    """
+    A method to read a mall into a graph of dense node indices, splitting
+    each file into columns and looking up all its IDs at once
+
+    Parameters
+    ----------
+    connectivities_file : str
+        the file name which stores connections between nodes.
+    pricing_file : str
+        the file name which stores the prices at different nodes.
+
+    Returns
+    -------
+    MallGraph
+        the graph, with the nodes in the order of the pricing file and the
+        connections of each node in file order.
+
+    """
+    tokens = np.concatenate([np.zeros(0, dtype="S1"),
+                             *_read_tokens(pricing_file)])
+    if tokens.size % 5:
+        raise ValueError(f"{pricing_file} must have 5 entries per node")
+    ids = tokens[0::5]
+    parts = [tokens[column::5].astype(np.int64) for column in range(1, 5)]
+    del tokens
+    keys = _id_keys(ids)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    if (sorted_keys[1:] == sorted_keys[:-1]).any():
+        raise ValueError(f"{pricing_file} lists a node ID twice")
+    if not ids.size:
+        # No entry matches this key, as no entry is empty
+        sorted_keys = np.zeros(1, dtype=np.uint64)
+    # The source and target of each connection, one row each
+    connections = np.concatenate([np.zeros(0, dtype=np.int64), *(
+        _node_indices(sorted_keys, order, tokens, connectivities_file)
+        for tokens in _read_tokens(connectivities_file))])
+    if connections.size % 2:
+        raise ValueError(f"{connectivities_file} must have 2 entries per "
+                         "connection")
+    connections = connections.reshape(-1, 2)
+    # Group the connections by node, keeping their order within a node
+    targets = connections[np.argsort(connections[:, 0], kind='stable'), 1]
+    offsets = np.zeros(ids.size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(connections[:, 0], minlength=ids.size),
+              out=offsets[1:])
+    return MallGraph(np.char.decode(ids, 'utf-8'), parts[0] / parts[1],
+                     parts[2] / parts[3], offsets, targets)
+
+def file_hash(file_name):
+    """
+    A method to compute the SHA-256 hash of a file
+
+    Parameters
+    ----------
+    file_name : str
+        the file name.
+
+    Returns
+    -------
+    str
+        the hexadecimal digest of the file.
+
+    """
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as my_sample_file:
+        for chunk in iter(lambda: my_sample_file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _cached_hash(file_name, index):
+    """
+    A method to get the hash of a file, only hashing it again when its size
+    or modification time changed
+
+    Parameters
+    ----------
+    file_name : str
+        the file name.
+    index : dict
+        the size, modification time and hash of files, by absolute path;
+        updated in place.
+
+    Returns
+    -------
+    str
+        the hexadecimal digest of the file.
+
+    """
+    path = os.path.abspath(file_name)
+    stats = os.stat(path)
+    entry = index.get(path)
+    if (entry is None or entry["size"] != stats.st_size or
+        entry["mtime_ns"] != stats.st_mtime_ns):
+        entry = {"size": stats.st_size, "mtime_ns": stats.st_mtime_ns,
+                 "sha256": file_hash(path)}
+        index[path] = entry
+    return entry["sha256"]
+
+def load_graph(connectivities_file, pricing_file, cache_dir = None,
+               rebuild = False):
+    """
+    A method to get the graph of a mall, memory-mapped from its compiled
+    arrays, which are compiled again when either file changes
+
+    Parameters
+    ----------
+    connectivities_file : str
+        the file name which stores connections between nodes.
+    pricing_file : str
+        the file name which stores the prices at different nodes.
+    cache_dir : str, optional
+        the directory of compiled graphs. The default is CACHE_DIR.
+    rebuild : bool, optional
+        whether to ignore any compiled graph. The default is False.
+
+    Returns
+    -------
+    MallGraph
+        the graph, with read-only memory-mapped arrays.
+
+    """
+    if cache_dir is None:
+        cache_dir = CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    index_file = os.path.join(cache_dir, INDEX_FILE)
+    index = {}
+    if os.path.exists(index_file):
+        with open(index_file, 'r', encoding='utf-8') as my_index_file:
+            index = json.load(my_index_file)
+    key = hashlib.sha256((_cached_hash(connectivities_file, index) + " " +
+                          _cached_hash(pricing_file, index)).encode(
+                              "ascii")).hexdigest()
+    temporary_file = index_file + ".tmp"
+    with open(temporary_file, 'w', encoding='utf-8') as my_index_file:
+        json.dump(index, my_index_file)
+    os.replace(temporary_file, index_file)
+    graph_dir = os.path.join(cache_dir, key)
+    if rebuild and os.path.exists(graph_dir):
+        shutil.rmtree(graph_dir)
+    if not os.path.exists(graph_dir):
+        graph = compile_graph(connectivities_file, pricing_file)
+        # Fill a temporary directory and rename it, so a reader never sees
+        # a graph half written
+        temporary_dir = graph_dir + f".tmp{os.getpid()}"
+        os.makedirs(temporary_dir, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(temporary_dir, name + ".npy"),
+                    getattr(graph, name))
+        try:
+            os.rename(temporary_dir, graph_dir)
+        except OSError:
+            # Another process saved the same graph first
+            shutil.rmtree(temporary_dir)
+    # Plain array views of the mappings index faster than memmaps
+    return MallGraph(*(np.load(os.path.join(graph_dir, name + ".npy"),
+                               mmap_mode='r').view(np.ndarray)
+                       for name in ARRAYS))
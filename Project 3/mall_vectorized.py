@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Jan  7 12:23:28 2024
+
+@author: Aidan Alme
+@JHED aalme2
+"""
+
+import numpy as np
+
+import mall_graph
+
+# The number of characters of the budgets file simulated at a time
+BLOCK_SIZE = 1 << 24
+
+def simulate(graph, budgets, start_nodes, seed = None):
+    """
+    A method to move every buyer at once, one purchase per step, until none
+    can buy any more
+
+    Parameters
+    ----------
+    graph : mall_graph.MallGraph
+        the mall.
+    budgets : numpy.ndarray
+        the float64 budget of each buyer.
+    start_nodes : numpy.ndarray
+        the index of each buyer's starting node.
+    seed : int or numpy.random.Generator, optional
+        the seed or generator of the moves. The default is a fresh one.
+
+    Returns
+    -------
+    numpy.ndarray
+        the float64 revenue of each node.
+
+    """
+    rng = np.random.default_rng(seed)
+    budgets = np.array(budgets, dtype=np.float64)
+    current = np.array(start_nodes, dtype=np.int64)
+    revenues = np.zeros(len(graph))
+    # The buyers who can still buy at their node
+    active = np.flatnonzero(budgets > graph.minimum_prices[current])
+    while active.size:
+        nodes = current[active]
+        # Every active buyer spends the fractional price of their budget
+        spent = budgets[active] * graph.fractional_prices[nodes]
+        budgets[active] -= spent
+        revenues += np.bincount(nodes, weights=spent, minlength=len(graph))
+        # Buyers with somewhere to go move to a random connection, the rest
+        # stop
+        starts = graph.offsets[nodes]
+        degrees = graph.offsets[nodes + 1] - starts
+        moving = degrees > 0
+        active = active[moving]
+        choices = (rng.random(active.size) * degrees[moving]).astype(np.int64)
+        current[active] = graph.targets[starts[moving] + choices]
+        active = active[budgets[active] >
+                        graph.minimum_prices[current[active]]]
+    return revenues
+
+def read_budgets(budgets_file, block_size = BLOCK_SIZE):
+    """
+    A generator of the budgets of a budgets file, a block of the file at a
+    time
+
+    Parameters
+    ----------
+    budgets_file : str
+        the file name which stores the budgets of the buyers.
+    block_size : int, optional
+        the number of characters read at a time. The default is BLOCK_SIZE.
+
+    Yields
+    ------
+    numpy.ndarray
+        the float64 budgets of the next block.
+
+    """
+    # The start of a budget cut off at the end of the previous block
+    carry = ""
+    with open(budgets_file, 'r', encoding='utf-8-sig') as my_sample_file:
+        for block in iter(lambda: my_sample_file.read(block_size), ""):
+            entries = (carry + block).split()
+            carry = ""
+            if entries and not block[-1].isspace():
+                carry = entries.pop()
+            if entries:
+                yield np.array(entries, dtype=np.float64)
+    if carry:
+        yield np.array([carry], dtype=np.float64)
+
+def run_simulation(connectivities_file, pricing_file, budgets_file,
+                   seed = None, cache_dir = None):
+    """
+    A method to run the simulation of mall_buyers with float64 budgets,
+    moving all the buyers in lockstep
+
+    Parameters
+    ----------
+    connectivities_file : str
+        the file name which stores connections between nodes.
+    pricing_file : str
+        the file name which stores the prices at different nodes.
+    budgets_file : str
+        the file name which stores the budgets of the buyers.
+    seed : int or numpy.random.Generator, optional
+        the seed or generator of the starting nodes and moves. The default
+        is a fresh one.
+    cache_dir : str, optional
+        the directory of compiled graphs, see mall_graph.load_graph. The
+        default is mall_graph.CACHE_DIR.
+
+    Returns
+    -------
+    total_revenue : float
+        the total revenue earned among the malls.
+    node_revenues : dictionary
+        a dictionary of node IDs and their fraction of the revenue earned.
+
+    """
+    rng = np.random.default_rng(seed)
+    graph = mall_graph.load_graph(connectivities_file, pricing_file,
+                                  cache_dir)
+    revenues = np.zeros(len(graph))
+    # Simulate the buyers a block of the file at a time, so only one block
+    # of buyers is held in memory
+    for budgets in read_budgets(budgets_file):
+        start_nodes = rng.integers(0, len(graph), budgets.size)
+        revenues += simulate(graph, budgets, start_nodes, rng)
+    total_revenue = float(revenues.sum())
+    # With no revenue at all, every node earned none of it
+    if total_revenue:
+        revenues /= total_revenue
+    node_revenues = dict(zip(graph.ids.tolist(), revenues.tolist()))
+    return total_revenue, node_revenues